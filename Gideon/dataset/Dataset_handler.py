@@ -46,11 +46,11 @@ class DatasetHandler:
         # Iterate through the files and directories in the specified path
         for file in dir_path.iterdir():
             if file.is_file() and (search_domain_file in file.name):    # Look for the domain file
-                domain_file = Path(file)
+                domain_file = file
             elif file.is_dir() and (search_problems_dir in file.name):  # Look for the problems directory
-                problems_dir_path = Path(file)
+                problems_dir_path = file
             elif file.is_dir() and (search_plans_dir in file.name): # Look for the plans directory
-                plans_dir_path = Path(file)
+                plans_dir_path = file
 
         # Ensure all required components (domain, problems, plans) exist
         if domain_file.exists() and problems_dir_path.exists() and plans_dir_path.exists():
@@ -90,13 +90,15 @@ def main(args):
 
     # Check if single domain directory path is provided
     elif args.single_domain_dir_path:
+        single_domain_dir = Path(args.single_domain_dir_path)     # Converted once for all the paths below
+
         # Process the single domain directory
         entries, single_entries = dataset_handler.process_directory(entries, single_entries, args.single_domain_dir_path)
-        print(f"Entries for {Path(args.single_domain_dir_path).name}: {single_entries}")
+        print(f"Entries for {single_domain_dir.name}: {single_entries}")
 
         # Append log data for the single domain
         log_data.append({
-            "Domain": Path(args.single_domain_dir_path).name,
+            "Domain": single_domain_dir.name,
             "Entries": single_entries,
             "Path": args.single_domain_dir_path
         })
@@ -113,11 +115,11 @@ def main(args):
             return
         
         # Define paths for saving datasets and logs
-        dataset_path = Path(args.single_domain_dir_path) / f"{Path(args.single_domain_dir_path).name}_dataset"
+        dataset_path = single_domain_dir / f"{single_domain_dir.name}_dataset"
         train_set_dir = dataset_path / "train_set"
         val_set_dir = dataset_path / "val_set"
         test_set_dir = dataset_path / "test_set"
-        logs_dir = Path(args.single_domain_dir_path) / "logs"
+        logs_dir = single_domain_dir / "logs"
 
         # Clean the datasets
         train_set = clean_set(train_set)
@@ -2,7 +2,7 @@
 import os
 import json
 import re
-import datetime
+import time
 from tabulate import tabulate   # To visualize data in tabular format
 
 # Project metadata
@@ -92,7 +92,7 @@ def generate_log(logs_dir, log_data, train_set, val_set, test_set):
         test_set: Test set entries.
     """
     # Generate timestamp for log filename
-    current_date = datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+    current_date = time.strftime('%Y-%m-%d_%H-%M-%S')
     log_filename = f"dataset_generation_{current_date}.log"
     log_file_path = os.path.join(logs_dir, log_filename)
 
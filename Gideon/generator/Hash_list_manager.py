@@ -3,11 +3,11 @@ Hash List Manager
 ===============
 
 Module for managing hash-based duplicate detection of PDDL problems.
-Provides functionality to generate, store, and verify SHA-256 hashes
+Provides functionality to generate, store, and verify BLAKE2b hashes
 of generated problems to ensure uniqueness.
 
 Features:
-- SHA-256 hash generation for PDDL problems
+- BLAKE2b (128-bit) hash generation for PDDL problems
 - Persistent storage of hashes in text file
 - Hash list management for duplicate detection
 - Support for resuming previous generation sessions
@@ -18,6 +18,9 @@ import os
 import hashlib
 import re
 
+# Module imports
+from utils import atomic_write
+
 # Project metadata
 __author__ = "Nicholas Attolino"
 __copyright__ = "Copyright 2024, Nicholas Attolino"
@@ -32,12 +35,10 @@ class Hash_list_Manager:
     Manager class for handling problem hashes and duplicate detection.
     
     Attributes:
-        hash_list (list): Class-level list storing all previously used hashes
+        hash_list (set): Set of all previously used hashes, for O(1) duplicate checks
         hash_list_filename (str): Name of file storing the hash list
         hash_list_path (str): Full path to the hash list file
     """
-    
-    hash_list = []      # Class-level list to store all previously used hashes
 
     def __init__(self, output_path):
         """
@@ -46,6 +47,7 @@ class Hash_list_Manager:
         Args:
             output_path (str): Directory path where the hash list file will be stored
         """
+        self.hash_list = set()      # Set of all previously used hashes (per instance, not shared)
         self.hash_list_filename = "hash_list.txt"       # Name of the hash list file
         self.hash_list_path = os.path.join(output_path, self.hash_list_filename)  # Full path to hash list file
 
@@ -53,27 +55,28 @@ class Hash_list_Manager:
         """
         Save the current hash list to file.
         
-        Writes each hash on a new line in the hash list file.
+        Writes each hash on a new line in the hash list file, with a single
+        call instead of one write per hash. The file is replaced atomically,
+        so a crash while saving keeps the previous hash list.
         
         Args:
             hash_list (list): List of hashes to save
         """
-        with open(self.hash_list_path, 'w') as f:
-            for hash in hash_list:
-                f.write(f"{hash}\n")
+        atomic_write(self.hash_list_path, "\n".join(hash_list) + "\n" if hash_list else "")
         
     def read_hash_list_to_list(self, answer):
         """
         Read previously stored hashes from file.
         
         Loads existing hashes if continuing a previous session (answer='Y'),
-        or returns empty list for new session (answer='N').
+        or returns empty list for new session (answer='N'). The loaded hashes
+        are also kept in the 'hash_list' set for the duplicate checks.
         
         Args:
             answer (str): 'Y' to load existing hashes, 'N' for fresh start
             
         Returns:
-            list: List of loaded hashes or empty list
+            list: List of loaded hashes (in problem order) or empty list
         """
         hash_list = []
         
@@ -84,22 +87,24 @@ class Hash_list_Manager:
                     hash_list = [line.strip() for line in f]
             elif answer == 'N':
                 hash_list = []
+        self.hash_list = set(hash_list)
         return hash_list
     
-def generate_hash(problem):
+def generate_hash(problem_str):
     """
-    Generate SHA-256 hash for a PDDL problem.
+    Generate BLAKE2b hash for a PDDL problem.
     
-    Converts the problem to string and generates a unique hash
-    to identify duplicate problems.
+    Hashes the PDDL text of the problem, already serialized to be written to
+    its file, to identify duplicate problems. The hash is only an identity
+    fingerprint, so the faster BLAKE2b with a 128-bit digest is used.
     
     Args:
-        problem: PDDL problem object to hash
+        problem_str (str): PDDL content of the problem to hash
         
     Returns:
-        str: Hexadecimal representation of the SHA-256 hash
+        str: Hexadecimal representation of the BLAKE2b hash
     """
-    hash_16bit = hashlib.sha256(str(problem).encode()).hexdigest()
+    hash_16bit = hashlib.blake2b(problem_str.encode(), digest_size=16).hexdigest()
     return hash_16bit
 
 def update_h_progress(progress_path, h_progress):
@@ -123,5 +128,4 @@ def update_h_progress(progress_path, h_progress):
             break
     
     # Rewrite the file with the new value
-    with open(progress_path, 'w') as file:
-        file.writelines(lines)
\ No newline at end of file
+    atomic_write(progress_path, "".join(lines))
\ No newline at end of file
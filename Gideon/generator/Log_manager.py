@@ -12,7 +12,7 @@ Features:
 """
 
 # Import necessary libraries
-import datetime
+import time
 import os
 
 # Project metadata
@@ -41,30 +41,34 @@ class Log_Manager:
         """
         self.logs_path = logs_path
     
-    def generate_log_file(self, i, problems_path, t):
+    def generate_log_file(self, i, problems_path, t, archive_path=None):
         """
         Generate a timestamped log file with generation statistics.
         
         Creates a log file containing:
         - Number of problems generated
-        - Directory path of generated problems
+        - Directory path of generated problems (or path of their tar archive)
         - Total generation time in seconds
         
         Args:
             i (int): Number of problems generated
             problems_path (str): Directory path containing generated problems
             t (float): Time taken for generation in seconds
+            archive_path (str): Tar archive containing the problems, if they were written into one
             
         File Format:
             problem_generation_YYYY-MM-DD_HH-MM-SS.log
         """
         # Generate timestamp for log filename
-        current_date = datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+        current_date = time.strftime('%Y-%m-%d_%H-%M-%S')
         log_filename = f"problem_generation_{current_date}.log"
         log_file_path = os.path.join(self.logs_path, log_filename)
         
         # Write generation statistics to log file
         with open(log_file_path, 'w') as log_file:
             log_file.write(f"Number of generated problems: {i}\n")
-            log_file.write(f"Directory of generated problems: {problems_path}\n")
+            if archive_path is not None:
+                log_file.write(f"Archive of generated problems: {archive_path}\n")
+            else:
+                log_file.write(f"Directory of generated problems: {problems_path}\n")
             log_file.write(f"Time required to generate problems: {t:.2f} seconds")
\ No newline at end of file
@@ -3,15 +3,18 @@ import os
 import random
 import re
 import shutil
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
 from tqdm import tqdm
 
 # Module imports
 from Hash_list_manager import generate_hash, update_h_progress
+from Problem_writer import Async_Problem_Writer
 from utils import final_output
 from Json_setup import PredicateStructure
 
 # PDDL imports
-from pddl import parse_domain
+from pddl.parser.domain import DomainParser
 from pddl.core import Problem
 from pddl.logic import Predicate
 from pddl.logic.base import And
@@ -24,6 +27,15 @@ __maintainer__ = "Nicholas Attolino"
 __email__ = "nicholasattolino@gmail.com"
 __status__ = "Development"
 
+# Random generator shared by the state generation, instead of the hidden instance behind the 'random' functions
+_RNG = random.Random()
+
+# Number of problems between two checkpoints of the progress and hash list files
+_CHECKPOINT_EVERY = 1000
+
+# State of the process generating the problems, set once by _init_worker()
+_worker_state = {}
+
 class PDDL_Generator:
     """
     Generates PDDL problem files based on a specified domain and configuration.
@@ -33,12 +45,16 @@ class PDDL_Generator:
         - progress_manager (object): Manages progress tracking.
         - log_manager (object): Manages logging of operations.
         - hashlist_manager (object): Manages duplicate checking for generated problems.
+        - archive (bool): If True, the problems are streamed into a single tar archive instead of one file each.
+        - workers (int): The number of processes generating the problems (all the CPUs if None).
     """
-    def __init__(self, num_problems, progress_manager, log_manager, hashlist_manager):
+    def __init__(self, num_problems, progress_manager, log_manager, hashlist_manager, archive=False, workers=None):
         self.num_problems = num_problems
         self.progress_manager = progress_manager
         self.log_manager = log_manager
         self.hashlist_manager = hashlist_manager
+        self.archive = archive
+        self.workers = workers or os.cpu_count() or 1
     
     def generate_problems(self, generator_path, domain_origin, domain, problems_path, output_path, json_schema, progress_path):
         """
@@ -54,61 +70,62 @@ class PDDL_Generator:
             - progress_path (str): The path for progress file.
         """
         if self.num_problems > 1:
-            counts_for_init_state = {}           # Dict for init_state to keep track of the number of problems generated for each type
-            counts_for_goal_state = {}           # Dict for goal_state to keep track of the number of problems generated for each type
+            counts_for_init_state = Counter()    # Dict for init_state to keep track of the number of problems generated for each type
+            counts_for_goal_state = Counter()    # Dict for goal_state to keep track of the number of problems generated for each type
             
             npg, answer = self.progress_manager.check_progress(problems_path, output_path)
             
-            if npg != 0:
-                hash_list = self.hashlist_manager.read_hash_list_to_list(answer)  # Needed to update hash list if you want to add more problems
-
-                # Add the Progress Bar
-                with tqdm(initial=npg, total=self.num_problems, leave=True, desc="Generating problems", unit=" problem") as pbar:
-                    
-                    # Processing
-                    for i in range(npg, self.num_problems):
-                        problem_name = f"{domain.name}_problem_00000{i + 1}"
-                        problem, counts_for_init_state, counts_for_goal_state = generate_single_problem(domain, problem_name, json_schema, counts_for_init_state, counts_for_goal_state)
-                        
-                        hash_16bit = generate_hash(problem)  # Assign the hash to each problem
-
-                        # Check Collision
-                        if hash_16bit in hash_list:
-                            print(f"Collision revealed: the problem '{problem.name}' is duplicated.\n")
-                            print(f"The hash '{hash_16bit}' is already present.\n")
-                        else:
-                            hash_list.append(hash_16bit)
-                            problem_file_path = os.path.join(problems_path, f"{problem_name}.pddl")
-                            with open(problem_file_path, 'w') as file:
-                                file.write(str(problem))
-
-                        pbar.update(1)                  # Update the Progress Bar
-
-            elif npg == 0:
-                hash_list = self.hashlist_manager.read_hash_list_to_list(answer)  # Needed to update hash list if you want to add more problems
-                h_progress = 0      # Progress value for the hash list
-
-                # Add the Progress Bar
-                with tqdm(total=self.num_problems, leave=True, desc="Generating problems", unit=" problem") as pbar:
-
-                    # Processing
-                    for i in range(self.num_problems):                            
-                        problem_name = f"{domain.name}_problem_00000{i + 1}"
-                        problem, counts_for_init_state, counts_for_goal_state = generate_single_problem(domain, problem_name, json_schema, counts_for_init_state, counts_for_goal_state)
-
-                        hash_16bit = generate_hash(problem)  # Assign the hash to each problem
-
-                        # Check Collision
-                        if hash_16bit in hash_list:
-                            print(f"Collision revealed: the problem '{problem.name}' is duplicated.\n")
-                            print(f"The hash '{hash_16bit}' is already present.\n")
-                        else:
-                            hash_list.append(hash_16bit)
-                            problem_file_path = os.path.join(problems_path, f"{problem_name}.pddl")
-                            with open(problem_file_path, 'w') as file:
-                                file.write(str(problem))
-
-                        pbar.update(1)                          # Update the Progress Bar
+            # Archive of this session (outside '/problems', which must only contain problem files)
+            archive_path = os.path.join(output_path, f"{domain.name}_problems_{npg + 1:06d}-{self.num_problems:06d}.tar") if self.archive else None
+
+            executor = None     # Pool of processes, shut down whatever happens
+            try:
+                # Problems are generated by a pool of processes when more CPUs are available, or here otherwise
+                if self.workers > 1:
+                    executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(domain_origin, json_schema))
+                    results = _generate_in_order(executor, npg, self.num_problems, max_pending=2 * self.workers)
+                else:
+                    _init_worker(domain_origin, json_schema, domain)
+                    results = map(_generate_worker, range(npg, self.num_problems))
+
+                # Problem files are written by a background thread, drained before the progress files are updated
+                with Async_Problem_Writer(archive_path=archive_path) as writer:
+                    hash_list = self.hashlist_manager.read_hash_list_to_list(answer)  # Needed to update hash list if you want to add more problems
+                    used_hashes = self.hashlist_manager.hash_list                      # Set of the same hashes, for O(1) duplicate checks
+
+                    # Invariants of the loop, bound once
+                    join = os.path.join
+                    submit = writer.submit
+
+                    # Add the Progress Bar (starting from the problems already generated, if any), repainted at most 10 times per second
+                    with tqdm(initial=npg, total=self.num_problems, leave=True, desc="Generating problems", unit=" problem",
+                              miniters=max(1, (self.num_problems - npg) // 1000), mininterval=0.1) as pbar:
+
+                        # Processing (duplicate checks and hash list stay in this process, in the problem order)
+                        for i, (problem_name, problem_str, hash_16bit, init_counts, goal_counts) in enumerate(results, start=npg):
+                            counts_for_init_state.update(init_counts)
+                            counts_for_goal_state.update(goal_counts)
+
+                            # Check Collision
+                            if hash_16bit in used_hashes:
+                                print(f"Collision revealed: the problem '{problem_name}' is duplicated.\n")
+                                print(f"The hash '{hash_16bit}' is already present.\n")
+                            else:
+                                used_hashes.add(hash_16bit)
+                                hash_list.append(hash_16bit)    # The list keeps the problem order for the hash list file
+                                submit(join(problems_path, f"{problem_name}.pddl"), problem_str)  # Written in background
+
+                            pbar.update(1)                  # Update the Progress Bar
+
+                            # Checkpoint, so that an interrupted generation can be resumed from here
+                            if (i + 1) % _CHECKPOINT_EVERY == 0:
+                                writer.flush()              # Only count the problems already written
+                                self.hashlist_manager.generate_hash_list(hash_list)
+                                update_h_progress(progress_path, len(hash_list))
+                                self.progress_manager.save_progress(i + 1)
+            finally:
+                if executor is not None:
+                    executor.shutdown(cancel_futures=True)
 
             #print(counts_for_init_state)   # Show how much pools for each type chosen in mutex_pools init
             #print(counts_for_goal_state)   # Show how much pools for each type chosen in mutex_pools goal
@@ -116,10 +133,10 @@ class PDDL_Generator:
             h_progress = len(hash_list)                     # Progress value of hash_list
             t = pbar.format_dict['elapsed']                     # Time required for the processing
             self.progress_manager.save_progress(i+1)                   # Save progress if ended processing
-            self.log_manager.generate_log_file(i+1, problems_path, t)   # Generate log file
+            self.log_manager.generate_log_file(i+1, problems_path, t, archive_path)   # Generate log file
             self.hashlist_manager.generate_hash_list(hash_list)       # Generate hash list file
             update_h_progress(progress_path, h_progress)        # Update hash list progress
-            final_output(i+1, t, problems_path)                   # Final output for the user
+            final_output(i+1, t, problems_path, archive_path)     # Final output for the user
 
         elif self.num_problems == 1:
             counts_for_init_state = {}           # Dict for init_state to keep track of the number of problems generated for each type
@@ -131,12 +148,90 @@ class PDDL_Generator:
 
             # Save the problem file
             problem_file_path = os.path.join(generator_path, f"{problem_name}.pddl")
-            with open(problem_file_path, 'w') as file:
+            with open(problem_file_path, 'w', buffering=1 << 20, newline='') as file:
                 file.write(str(problem))
             print(f"Path of the generated problem file: {problem_file_path}\n")
 
 # ===== Generating PDDL Problem File =====
 
+def _init_worker(domain_origin, json_schema, domain=None):
+    """
+    Prepares a process to generate problems, once instead of for every problem.
+
+    Parameters:
+        - domain_origin (str): The path to the PDDL domain file, parsed again if the domain is not given.
+        - json_schema (object): The JSON schema containing problem configuration (with the objects already generated).
+        - domain (object): The PDDL domain object, if already loaded in this process.
+    """
+    if domain is None:
+        domain = load_domain(domain_origin)
+    _worker_state["domain"] = domain
+    _worker_state["json_schema"] = json_schema
+    _worker_state["constants"] = generate_problem_constants(domain, json_schema)     # Built once, not for every problem
+    _worker_state["name_fmt"] = f"{domain.name}_problem_{{:06d}}".format
+    # Forked processes would otherwise share the same random sequences (the JSON schema draws from the 'random' module)
+    random.seed()
+    _RNG.seed()
+
+def _generate_worker(i):
+    """
+    Generates the i-th problem with the state set by _init_worker().
+
+    Parameters:
+        - i (int): The index of the problem (0-based).
+
+    Returns:
+        problem_name (str): The name of the problem.
+        problem_str (str): The PDDL content of the problem.
+        hash_16bit (str): The hash of the problem, for the duplicate checks.
+        counts_for_init_state (dict): The number of pools chosen in mutex_pools for the initial state of this problem.
+        counts_for_goal_state (dict): The number of pools chosen in mutex_pools for the goal state of this problem.
+    """
+    problem_name = _worker_state["name_fmt"](i + 1)
+    problem, counts_for_init_state, counts_for_goal_state = generate_single_problem(_worker_state["domain"], problem_name, _worker_state["json_schema"], {}, {},
+                                                                                    constants=_worker_state["constants"])
+    problem_str = str(problem)     # Serialized once, for the problem file and for the hash
+    return problem_name, problem_str, generate_hash(problem_str), counts_for_init_state, counts_for_goal_state
+
+def _generate_chunk(start, stop):
+    """
+    Generates the problems with index in [start, stop), in order (one task of the pool).
+
+    Parameters:
+        - start (int): The index of the first problem (0-based).
+        - stop (int): The index after the last problem.
+
+    Returns:
+        results (list): The results of _generate_worker() for each problem.
+    """
+    return [_generate_worker(i) for i in range(start, stop)]
+
+def _generate_in_order(executor, start, stop, max_pending, chunksize=64):
+    """
+    Yields the results of _generate_worker() for the problems in [start, stop), in the problem order.
+
+    Only max_pending chunks are submitted ahead of the consumer, so the generated problems
+    never pile up in memory when the checks and the writes are slower than the workers.
+
+    Parameters:
+        - executor (ProcessPoolExecutor): The pool of processes, prepared by _init_worker().
+        - start (int): The index of the first problem (0-based).
+        - stop (int): The index after the last problem.
+        - max_pending (int): The maximum number of chunks submitted and not consumed yet.
+        - chunksize (int): The number of problems of each chunk.
+
+    Yields:
+        result (tuple): The result of _generate_worker() for each problem.
+    """
+    pending = deque()       # Futures of the submitted chunks, in the problem order
+    next_start = start
+    while pending or next_start < stop:
+        # Keep the pool busy, up to the bound
+        while next_start < stop and len(pending) < max_pending:
+            pending.append(executor.submit(_generate_chunk, next_start, min(next_start + chunksize, stop)))
+            next_start += chunksize
+        yield from pending.popleft().result()
+
 def load_domain(domain_origin):
     """
     Loads a PDDL domain from a specified file.
@@ -152,10 +247,11 @@ def load_domain(domain_origin):
     """
     with open(domain_origin, 'r') as file:
         content = file.read()
-        if ":functions" in content:
-            raise SystemExit("This domain is not valid because it has instances of 'numeric fluents'!")
-        else:
-            domain = parse_domain(domain_origin)
+    if ":functions" in content:
+        raise SystemExit("This domain is not valid because it has instances of 'numeric fluents'!")
+
+    # Parse the content already read instead of reading the file again
+    domain = DomainParser()(content)
     return domain
 
 def generate_json_predicates(dict_ordered_by_key, set_predicates):
@@ -171,29 +267,25 @@ def generate_json_predicates(dict_ordered_by_key, set_predicates):
     """
     predicates_dict = {}    # Dictionary to save predicates
 
+    # Arity of each predicate of the domain, computed once instead of for every key and value
+    arities = {predicate.name: len(predicate.terms) for predicate in set_predicates}
+
     for outer_key, inner_dict in dict_ordered_by_key.items():
         # Ensure outer_key exists in the dictionary
-        if outer_key not in predicates_dict:
-            predicates_dict[outer_key] = {}
-
-        for predicate in set_predicates:
-            for inner_key, value_list in inner_dict.items():
-                # Ensure inner_key exists in the inner dictionary
-                if inner_key not in predicates_dict[outer_key]:
-                    predicates_dict[outer_key][inner_key] = []
-
-                for value in value_list:
-                    if predicate.name == inner_key:
-                        if len(predicate.terms) == 2:
-                            obj1 = value[0]
-                            obj2 = value[1]
-                            p = Predicate(predicate.name, obj1, obj2)
-                        elif len(predicate.terms) == 1:
-                            obj = value[0]
-                            p = Predicate(predicate.name, obj)
-
-                        # Add the predicate to the corresponding list
-                        predicates_dict[outer_key][inner_key].append(p)
+        inner_predicates = predicates_dict.setdefault(outer_key, {})
+        if not arities:
+            continue
+
+        for inner_key, value_list in inner_dict.items():
+            # Ensure inner_key exists in the inner dictionary
+            predicate_list = inner_predicates.setdefault(inner_key, [])
+
+            # Look up the predicate by name and add one predicate for each value
+            arity = arities.get(inner_key)
+            if arity == 2:
+                predicate_list.extend(Predicate(inner_key, value[0], value[1]) for value in value_list)
+            elif arity == 1:
+                predicate_list.extend(Predicate(inner_key, value[0]) for value in value_list)
 
     return predicates_dict
     
@@ -235,7 +327,7 @@ def generate_constant_initial_state(all_created_objects, json_schema):
             const_init_state.append(Predicate(predicate_name, *constant_terms))
     return const_init_state
 
-def generate_init_state(predicates_dict, constant_initial_state, json_schema, counts_for_init_state):
+def generate_init_state(predicates_dict, constant_initial_state, json_schema, counts_for_init_state, rng=None):
     """
     Generates the initial state for the PDDL problem.
 
@@ -244,12 +336,15 @@ def generate_init_state(predicates_dict, constant_initial_state, json_schema, co
         - constant_initial_state (list): A list of predicates representing the constant initial state.
         - json_schema (object): The JSON schema containing initial state information.
         - counts_for_init_state (dict): A dictionary that keeps track of the number of pools chosen in mutex_pools to indicate each probability
+        - rng (random.Random): The random generator to use (the module one if None).
 
     Returns:
         initial_state (set): A set representing the initial state of the problem.
         counts_for_init_state (dict): The updated counts_for_init_state dictionary reflecting the number of predicates chosen from each pool.
     """
     initial_state = set()   # Initialize an empty set to store the initial state predicates
+    rng = rng or _RNG       # Random generator, bound once with its method used in the loops
+    rand = rng.random
 
     # Add all constant predicates to the initial state
     for pred in constant_initial_state:
@@ -269,7 +364,7 @@ def generate_init_state(predicates_dict, constant_initial_state, json_schema, co
                 raise ValueError(f"Le probabilità per il gruppo mutex {i} non sommano a 1.")
             
             # Select a predicate from the pool based on the defined probabilities
-            selected_pool = random.choices(pool, probabilities)[0]
+            selected_pool = rng.choices(pool, probabilities)[0]
 
             # Increment the count for the selected pool
             if selected_pool not in counts_for_init_state:
@@ -293,7 +388,7 @@ def generate_init_state(predicates_dict, constant_initial_state, json_schema, co
                     for predicate_structure in predicate_list:
                         # Apply probability filtering if the predicate structure has an associated probability
                         if isinstance(predicate_structure, PredicateStructure):
-                            if random.random() > predicate_structure.probability:
+                            if rand() > predicate_structure.probability:
                                 continue  # Skip this predicate based on its probability
                         initial_state.add(predicate_structure)  # Add the predicate to the initial state
 
@@ -337,7 +432,7 @@ def generate_constant_goal_state(all_created_objects, json_schema):
             const_goal_state.append(Predicate(predicate_name, *constant_terms))
     return const_goal_state
 
-def generate_goal_state(predicates_dict, constant_goal_state, json_schema, counts_for_goal_state):
+def generate_goal_state(predicates_dict, constant_goal_state, json_schema, counts_for_goal_state, rng=None):
     """
     Generates the goal state for the PDDL problem.
 
@@ -346,12 +441,15 @@ def generate_goal_state(predicates_dict, constant_goal_state, json_schema, count
         - constant_goal_state (list): A list of predicates representing the constant goal state.
         - json_schema (object): The JSON schema containing goal state information.
         - counts_for_goal_state (dict): A dictionary that keeps track of the number of pools chosen in mutex_pools to indicate each probability
+        - rng (random.Random): The random generator to use (the module one if None).
 
     Returns:
         goal_state (set): A set representing the goal state of the problem.
         counts_for_goal_state (dict): The updated counts_for_goal_state dictionary reflecting the number of predicates chosen from each pool.
     """
     goal_state = set()   # Initialize an empty set to store the goal state predicates
+    rng = rng or _RNG       # Random generator, bound once with its method used in the loops
+    rand = rng.random
 
     # Add all constant predicates to the goal state
     for pred in constant_goal_state:
@@ -371,7 +469,7 @@ def generate_goal_state(predicates_dict, constant_goal_state, json_schema, count
                 raise ValueError(f"Le probabilità per il gruppo mutex {i} non sommano a 1.")
             
             # Select a predicate from the pool based on the defined probabilities
-            selected_pool = random.choices(pool, probabilities)[0]
+            selected_pool = rng.choices(pool, probabilities)[0]
 
             # Increment the count for the selected pool
             if selected_pool not in counts_for_goal_state:
@@ -395,13 +493,32 @@ def generate_goal_state(predicates_dict, constant_goal_state, json_schema, count
                     for predicate_structure in predicate_list:
                         # Apply probability filtering if the predicate structure has an associated probability
                         if isinstance(predicate_structure, PredicateStructure):
-                            if random.random() > predicate_structure.probability:
+                            if rand() > predicate_structure.probability:
                                 continue  # Skip this predicate based on its probability
                         goal_state.add(predicate_structure)  # Add the predicate to the initial state
 
     return goal_state, counts_for_goal_state
 
-def generate_single_problem(domain, problem_name, json_schema, counts_for_init_state, counts_for_goal_state):
+def generate_problem_constants(domain, json_schema):
+    """
+    Generates the parts of a problem that are the same for every problem of a generation.
+
+    Parameters:
+        - domain (object): The PDDL domain object.
+        - json_schema (object): The JSON schema containing problem configuration (with the objects already generated).
+
+    Returns:
+        constants (tuple): All the created objects, the set of the domain predicates, the constant initial state and the constant goal state.
+    """
+    # Generate all objects
+    all_created_objects = [obj for pool in json_schema.objects_pools.values() for obj in pool.created_objects]
+    set_predicates = set(domain.predicates)           # Needed to use predicates into the functions
+
+    constant_initial_state = generate_constant_initial_state(all_created_objects, json_schema)
+    constant_goal_state = generate_constant_goal_state(all_created_objects, json_schema)
+    return all_created_objects, set_predicates, constant_initial_state, constant_goal_state
+
+def generate_single_problem(domain, problem_name, json_schema, counts_for_init_state, counts_for_goal_state, rng=None, constants=None):
     """
     Generates a single PDDL problem instance.
 
@@ -411,6 +528,8 @@ def generate_single_problem(domain, problem_name, json_schema, counts_for_init_s
         - json_schema (object): The JSON schema containing problem configuration.
         - counts_for_init_state (dict): A dictionary that keeps track of the number of pools chosen in mutex_pools to indicate each probability
         - counts_for_goal_state (dict): A dictionary that keeps track of the number of pools chosen in mutex_pools to indicate each probability
+        - rng (random.Random): The random generator to use (the module one if None).
+        - constants (tuple): The result of generate_problem_constants(), shared by the problems (generated here if None).
 
 
     Returns:
@@ -418,18 +537,16 @@ def generate_single_problem(domain, problem_name, json_schema, counts_for_init_s
         counts_for_init_state (dict): The updated counts_for_init_state dictionary reflecting the number of predicates chosen from each pool.
         counts_for_goal_state (dict): The updated counts_for_goal_state dictionary reflecting the number of predicates chosen from each pool.
     """
-    # Generate all objects
-    all_created_objects = [obj for pool in json_schema.objects_pools.values() for obj in pool.created_objects]
+    if constants is None:
+        constants = generate_problem_constants(domain, json_schema)
+    all_created_objects, set_predicates, constant_initial_state, constant_goal_state = constants
 
-    prob_predicates = domain.predicates
-    set_predicates = set(prob_predicates)           # Needed to use predicates into the functions
+    # Only the predicates change from one problem to another
     dict_ordered_by_key = json_schema.gen_dict_ordered()   # Dictionary ordered to represent predicates from JSON
     predicates_dict = generate_json_predicates(dict_ordered_by_key, set_predicates) # Predicates formatted
 
-    constant_initial_state = generate_constant_initial_state(all_created_objects, json_schema)
-    init_state, counts_for_init_state = generate_init_state(predicates_dict, constant_initial_state, json_schema, counts_for_init_state)
-    constant_goal_state = generate_constant_goal_state(all_created_objects, json_schema)
-    goal_state, counts_for_goal_state = generate_goal_state(predicates_dict, constant_goal_state, json_schema, counts_for_goal_state)
+    init_state, counts_for_init_state = generate_init_state(predicates_dict, constant_initial_state, json_schema, counts_for_init_state, rng)
+    goal_state, counts_for_goal_state = generate_goal_state(predicates_dict, constant_goal_state, json_schema, counts_for_goal_state, rng)
 
     # Instance of the problem
     problem = Problem(
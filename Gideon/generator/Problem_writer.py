@@ -0,0 +1,153 @@
+"""
+Problem Writer
+=============
+
+Module for writing the generated PDDL problem files in background.
+Moves the file I/O off the generation loop, so that problems keep being
+generated while the previous ones are written to disk.
+
+Features:
+- Background writer thread fed by a bounded queue
+- Large write buffers for each problem file
+- Optional single tar archive instead of one file per problem
+- Flush of the pending writes for the periodic checkpoints and before the generation ends
+"""
+
+# Import necessary libraries
+import io
+import os
+import queue
+import tarfile
+import threading
+import time
+
+# Project metadata
+__author__ = "Nicholas Attolino"
+__copyright__ = "Copyright 2024, Nicholas Attolino"
+__license__ = "GNU"
+__version__ = "1.0.0"
+__maintainer__ = "Nicholas Attolino"
+__email__ = "nicholasattolino@gmail.com"
+__status__ = "Development"
+
+# Queue item asking the writer thread to push its buffered data to disk
+_SYNC = object()
+
+class Async_Problem_Writer:
+    """
+    Writer class that saves problem files on a background thread.
+
+    Use it as a context manager: on exit every pending problem is written
+    before the progress, log and hash list files (written synchronously) are updated.
+
+    Attributes:
+        archive_path (str): Path of the tar archive collecting the problems, or None to write one file per problem
+        queue (queue.Queue): Pending (path, content) items, _SYNC to sync the archive, None to stop the thread
+        thread (threading.Thread): Thread that writes the pending problems
+        error (Exception): First error raised by the writer thread, if any
+    """
+
+    def __init__(self, max_pending=256, archive_path=None):
+        """
+        Initialize the writer and start its thread.
+
+        Args:
+            max_pending (int): Maximum number of problems waiting to be written, to bound memory usage
+            archive_path (str): Path of the tar archive to stream the problems into, None to write one file per problem
+        """
+        self.archive_path = archive_path
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name="problem-writer", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        """
+        Write the queued problems until the stop sentinel is received.
+        """
+        if self.archive_path is not None:
+            self._run_archive()
+            return
+
+        while (item := self.queue.get()) is not None:
+            if self.error is None and item is not _SYNC:   # Each file is complete once closed
+                path, content = item
+                try:
+                    with open(path, 'w', buffering=1 << 20, newline='') as file:    # No newline translation
+                        file.write(content)
+                except Exception as e:
+                    self.error = e      # Reported to the generation loop by close()
+            self.queue.task_done()
+
+    def _run_archive(self):
+        """
+        Write the queued problems into a single tar archive, as sequential writes with a 2 MiB buffer.
+
+        The archive is not opened as a stream ('w|'), which keeps its own buffer: every member
+        goes straight to the file object, so a sync leaves only whole members on disk.
+        """
+        stopped = False     # True once the stop sentinel has been received
+        try:
+            with open(self.archive_path, 'wb', buffering=2 << 20) as archive_file, \
+                 tarfile.open(fileobj=archive_file, mode='w') as tar:
+                while (item := self.queue.get()) is not None:
+                    try:
+                        if item is _SYNC:
+                            archive_file.flush()
+                            os.fsync(archive_file.fileno())     # The checkpoint counts these problems as saved
+                            continue
+                        path, content = item
+                        data = content.encode()
+                        info = tarfile.TarInfo(name=os.path.basename(path))   # Problems are stored flat in the archive
+                        info.size = len(data)
+                        info.mtime = time.time()
+                        tar.addfile(info, io.BytesIO(data))
+                    finally:
+                        self.queue.task_done()
+                stopped = True
+        except Exception as e:
+            self.error = e      # Reported to the generation loop by close()
+            if not stopped:
+                while self.queue.get() is not None:
+                    self.queue.task_done()  # Keep draining so that submit() and flush() never block
+
+    def submit(self, path, content):
+        """
+        Queue a problem file to be written.
+
+        Args:
+            path (str): Path of the problem file
+            content (str): PDDL content of the problem
+        """
+        self.queue.put((path, content))
+
+    def flush(self):
+        """
+        Wait until every problem queued so far is written.
+        In archive mode the archive is also flushed and synced to disk.
+
+        Raises:
+            Exception: The first error raised while writing a problem file
+        """
+        self.queue.put(_SYNC)
+        self.queue.join()
+        if self.error is not None:
+            raise self.error
+
+    def close(self):
+        """
+        Wait until every queued problem is written and stop the thread.
+
+        Raises:
+            Exception: The first error raised while writing a problem file
+        """
+        self.queue.put(None)
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -16,6 +16,9 @@ Features:
 import os
 import re
 
+# Module imports
+from utils import atomic_write
+
 # Project metadata
 __author__ = "Nicholas Attolino"
 __copyright__ = "Copyright 2024, Nicholas Attolino"
@@ -25,6 +28,9 @@ __maintainer__ = "Nicholas Attolino"
 __email__ = "nicholasattolino@gmail.com"
 __status__ = "Development"
 
+# Line containing 'npg_progress' in the progress file
+_NPG_RE = re.compile(rb"npg_progress\s*=\s*(\d+)")
+
 class Progress_Manager:
     """
     Manager class for handling generation progress tracking.
@@ -46,7 +52,8 @@ class Progress_Manager:
         """
         Save current progress into the 'progress.txt' file.
         
-        Writes the current number of generated problems to the progress file.
+        Writes the current number of generated problems to the progress file,
+        atomically so that an interrupted save never loses the other values.
         
         Args:
             i (int): Current number of problems generated
@@ -63,8 +70,7 @@ class Progress_Manager:
                 break
         
         # Rewrite the file with the new value
-        with open(self.progress_path, 'w') as file:
-            file.writelines(lines)
+        atomic_write(self.progress_path, "".join(lines))
 
     def read_progress(self):
         """
@@ -75,21 +81,17 @@ class Progress_Manager:
         Returns:
             Value (int): Number of problems previously generated, or 0 if no progress file exists
         """
-        # Define a regex pattern to match the line containing 'npg_progress'
-        pattern = r"npg_progress\s*=\s*(\d+)"
-        
-        # Check if the progress file exists
-        if os.path.exists(self.progress_path):
-            with open(self.progress_path, 'r') as f:
+        # Read the raw bytes, there is no need to decode the whole file
+        try:
+            with open(self.progress_path, 'rb') as f:
                 content = f.read()
-                
-                # Search for the pattern in the file content
-                match = re.search(pattern, content)
-                if match:
-                    # If a match is found, return the captured number (group 1)
-                    return int(match.group(1))
-        # Return 0 if no progress file exists or no match is found
-        return 0
+        except FileNotFoundError:
+            return 0    # Return 0 if no progress file exists
+
+        # Search for the pattern in the file content
+        match = _NPG_RE.search(content)
+        # If a match is found, return the captured number (group 1), 0 otherwise
+        return int(match.group(1)) if match else 0
         
     def check_progress(self, problems_path, output_path):
         """
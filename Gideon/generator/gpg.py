@@ -59,6 +59,8 @@ def main(args):
         progress_manager,
         log_manager,
         hashlist_manager,
+        archive=args.archive,
+        workers=args.workers,
     )
 
     # Start problem generation
@@ -82,6 +84,8 @@ if __name__ == "__main__":
     parser.add_argument('-o','--output_dir', type=str, help='Output path of PDDL problem files')
     parser.add_argument('-n', '--num_problems', type=int, help='Number of problems that you want to create')
     parser.add_argument('-j', '--json_path', type=str, help='Origin path of the JSON file')
+    parser.add_argument('--archive', action='store_true', help='Write the problems into a single tar archive instead of one file each (the planner needs them extracted into /problems)')
+    parser.add_argument('-w', '--workers', type=int, help='Number of processes generating the problems (default: all the CPUs)')
     args = parser.parse_args()
 
     # Launch main function
@@ -85,7 +85,7 @@ class Folder_Structure:
 
             return problems_path, logs_path, output_path, progress_path
         
-def final_output(i, t, problems_path):
+def final_output(i, t, problems_path, archive_path=None):
     """
     Prints the final output summary after problem generation.
 
@@ -93,7 +93,29 @@ def final_output(i, t, problems_path):
         - i (int): The number of generated problems.
         - t (float): The time taken to generate the problems.
         - problems_path (str): The directory where the problems are generated.
+        - archive_path (str): The tar archive containing the problems, if they were written into one.
     """
     print(f"Number of generated problems: {i}")
-    print(f"Directory of generated problems: {problems_path}")
-    print(f"Time required to generate problems: {t:.2f} seconds")
\ No newline at end of file
+    if archive_path is not None:
+        print(f"Archive of generated problems: {archive_path}")
+    else:
+        print(f"Directory of generated problems: {problems_path}")
+    print(f"Time required to generate problems: {t:.2f} seconds")
+
+def atomic_write(path, data):
+    """
+    Writes a text file atomically, so that a crash never leaves it truncated.
+
+    The data is written and synced to a temporary file next to the target, which
+    then replaces the target in a single step.
+
+    Parameters:
+        - path (str): The path of the file to write.
+        - data (str): The content of the file.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())        # Data on stable storage before it becomes visible
+    os.replace(tmp_path, path)
\ No newline at end of file
@@ -3,23 +3,26 @@ import os                   # For control commands
 import subprocess           # To execute Planner and Validate
 import shutil               # To copy or remove files
 import re                   # To perform search functions
-import pickle               # To easily make figures using pandas
+import atexit               # To wait for pending writes before exiting
+import numpy as np          # To save execution times as a binary array
+from concurrent.futures import ThreadPoolExecutor   # To write files in background
 from tqdm import tqdm       # To put a bar that increases
-from pathlib import Path    # To iterate over the paths
+from pathlib import Path    # To take the names of the problems
 
 # Modules import
-from pddl import parse_domain
+from pddl.parser.domain import DomainParser
 from utils_planner import (
     rename_plan,
     convert_to_IPC_format,
+    convert_plan_to_IPC_format,
     final_output,
     calculate_statistics,
+    RunningStats,
     delete_and_renumber,
     read_plans,
     update_npg_progress,
     read_failed_problems_file,
-    update_fp_progress,
-    read_fp_progress
+    update_fp_progress
 )
 
 # Project metadata
@@ -31,9 +34,17 @@ __maintainer__ = "Nicholas Attolino"
 __email__ = "nicholasattolino@gmail.com"
 __status__ = "Development"
 
+# Regex pattern compiled once at import time, to scan the planner output
+_TIME_RE = re.compile(rb"Time:\s*([\d.]+)")     # Time reported by the planner
+
+# Single background worker shared by every instance, for writes nothing else waits for,
+# joined before the process exits
+_IO_EXECUTOR = ThreadPoolExecutor(max_workers=1)
+atexit.register(_IO_EXECUTOR.shutdown)
+
 class Planner_generator:
     def __init__(self, num_problems, output_dir, planner_progress_manager, planner_logs_manager,
-                 planner, planner_path, validate_path):
+                 planner, planner_path, validate_path, resume="auto", on_failed="auto", verbose=False):
         """
         Initializes the Planner_generator with the specified parameters.
         
@@ -45,6 +56,9 @@ class Planner_generator:
             planner (str): The planner to be used for generation.
             planner_path (str): Path to the planner executable.
             validate_path (str): Path to the validation tool.
+            resume (str): Whether to resume a stopped processing ('yes', 'no' or 'auto', see check_progress).
+            on_failed (str): What to do with the failed problems ('delete', 'delete-total', 'keep' or 'auto', see delete_and_renumber).
+            verbose (bool): Whether to report the intermediate steps of the post-processing.
         """
         self.num_problems = num_problems
         self.output_dir = output_dir
@@ -53,6 +67,10 @@ class Planner_generator:
         self.planner = planner
         self.planner_path = planner_path
         self.validate_path = validate_path
+        self.resume = resume
+        self.on_failed = on_failed
+        self.verbose = verbose
+        self.logs_dir_path = os.path.join(output_dir, "logs")     # Directory of the log files
 
     def generate_plans(self, problems_paths, domain_path, plans_dir_path, domain, results_dir_path, failed_problems_after_Ctrl_C):
         """
@@ -71,83 +89,30 @@ class Planner_generator:
             results_dir_path (str): Directory where results will be saved.
             failed_problems_after_Ctrl_C (str): Path to the failed_problems file.
         """
+        # Path of the file where execution times will be saved
+        self.times_file_path = os.path.join(results_dir_path, "execution_times.npy")
+
         try:
             if self.num_problems > 1:
-                ppg = self.planner_progress_manager.check_progress(plans_dir_path, self.output_dir)
+                ppg = self.planner_progress_manager.check_progress(plans_dir_path, self.output_dir, self.resume)
+
+                self.p_failed = 0               # Counter of plans failed
+                self.execution_times = RunningStats()   # Accumulator of execution times
+                self.failed_problems = []       # List to collect problems failed
 
-                p_failed = 0                # Counter of plans failed
-                execution_times = []        # List to collect execution times
-                failed_problems = []        # List to collect problems failed
+                # Problems processed after the last saved progress
+                ppg = self._restore_journal(problems_paths, ppg)
 
                 if ppg != 0:
                     existing_problems = read_failed_problems_file(failed_problems_after_Ctrl_C) # Read failed problems found until now
-                    fp_progress = read_fp_progress(self.planner_progress_manager.progress_path) # Failed problems progress value
-
-                    # Add the Progress Bar
-                    with tqdm(initial=ppg, total=self.num_problems, leave=True, desc="Generating plans", unit=" plan") as pbar:
-                        # Processing
-                        for i, problem in enumerate(problems_paths[ppg:], start=ppg):
-                            failed_problems, p_failed, new_name, execution_times = choose_planner(
-                                self.planner, self.planner_path, domain_path, problem, plans_dir_path,
-                                self.output_dir, domain, i, p_failed, execution_times, failed_problems)
-                            failed_problems, p_failed = check_val_and_move(
-                                self.validate_path, domain_path, problem, new_name, plans_dir_path, p_failed, failed_problems)
-                            pbar.update(1) # Update the Progress Bar
-                
-                elif ppg == 0:
+                else:
                     existing_problems = set()   # Initialize failed problems found until now
-                    fp_progress = 0     # Initialize failed problems progress value
-
-                    # Add the Progress Bar
-                    with tqdm(initial=ppg, total=self.num_problems, leave=True, desc="Generating plans", unit=" plan") as pbar:
-                        # Processing
-                        for i, problem in enumerate(problems_paths[ppg:], start=ppg):
-                            failed_problems, p_failed, new_name, execution_times = choose_planner(
-                                self.planner, self.planner_path, domain_path, problem, plans_dir_path,
-                                self.output_dir, domain, i, p_failed, execution_times, failed_problems)
-                            failed_problems, p_failed = check_val_and_move(
-                                self.validate_path, domain_path, problem, new_name, plans_dir_path, p_failed, failed_problems)
-                            pbar.update(1) # Update the Progress Bar
-                
-                # Convert each plan to IPC format
-                convert_to_IPC_format(plans_dir_path)
 
-                # Check deleted problems and renumber
-                answer = delete_and_renumber(self.output_dir, failed_problems, existing_problems, failed_problems_after_Ctrl_C, self.planner_progress_manager.progress_path)
-                
-                existing_problems = read_failed_problems_file(failed_problems_after_Ctrl_C)     # Read all the failed problems until now
-                fp_progress = len(existing_problems)   # Total number of failed problems
-                update_fp_progress(self.planner_progress_manager.progress_path, fp_progress)     # Update fp_progress
-
-                # Calculate statistics
-                avg_time, min_time, max_time, median_time, std_dev = calculate_statistics(execution_times)
-
-                # Save data in '/results' with pickle
-                pickle_file_path = os.path.join(results_dir_path,"execution_times.pkl")
-                with open(pickle_file_path, "wb") as file:  # "wb" = write binary
-                    pickle.dump(execution_times, file)
-                print(f"Times saved in: {pickle_file_path}")
-
-                # Time required for the processing
-                t = pbar.format_dict['elapsed']
-                # Use divmod to calculate hours, minutes and seconds
-                minutes, seconds = divmod(t, 60)
-                hours, minutes = divmod(minutes, 60)
-
-                # Count generated plans to save progress
-                last_plan = read_plans(plans_dir_path)
-                self.planner_progress_manager.save_progress(last_plan)
-
-                # Update the progress of generated problems
-                if answer == "1" or answer == "2":
-                    update_npg_progress(last_plan, self.planner_progress_manager.progress_path)
-
-                # Generate log file
-                self.planner_logs_manager.generate_log_file(
-                    i+1, p_failed, fp_progress, plans_dir_path, hours, minutes, seconds, avg_time, min_time, max_time, median_time, std_dev)
-                
-                # Final output for the user
-                final_output(i+1, p_failed, fp_progress, plans_dir_path, hours, minutes, seconds, avg_time, min_time, max_time, median_time, std_dev)
+                # Processing
+                execution_times, processed = self._run_generation_loop(problems_paths, ppg, domain_path, plans_dir_path, domain)
+
+                # Post-processing, statistics and final output
+                self._finalize(execution_times, plans_dir_path, results_dir_path, self.pbar, processed, existing_problems, failed_problems_after_Ctrl_C)
         
         except KeyboardInterrupt:
             # Intercepts Ctrl+C and offer a choice to the User
@@ -158,64 +123,158 @@ class Planner_generator:
                     print("Deleting in progress...")
                     shutil.rmtree(plans_dir_path)
                     shutil.rmtree(results_dir_path)
-                    log_dir_path = Path(os.path.join(self.output_dir, "logs"))
                     search_string = "planning"
                     search_failed = "total"
-                    for file in log_dir_path.iterdir():
-                        if file.is_file() and (search_string in file.name):
-                            os.remove(file)
-                    for file in Path(self.output_dir).iterdir():
-                        if file.is_file() and (search_failed in file.name):
-                            os.remove(file)
+                    # DirEntry.is_file() uses the type cached by scandir, without an extra stat
+                    with os.scandir(self.logs_dir_path) as entries:
+                        for entry in entries:
+                            if entry.is_file() and (search_string in entry.name):
+                                os.unlink(entry.path)
+                    with os.scandir(self.output_dir) as entries:
+                        for entry in entries:
+                            if entry.is_file() and (search_failed in entry.name):
+                                os.unlink(entry.path)
                     self.planner_progress_manager.save_progress(0)
+                    self.planner_progress_manager.clear_journal()
                     update_fp_progress(self.planner_progress_manager.progress_path, 0)
                     
                     print("All the generated files have been deleted")
                     break
                 elif user_input == 'n':
-                    # Convert each plan to IPC format
-                    convert_to_IPC_format(plans_dir_path)
-
-                    # Check failed problems, delete and renumber
-                    answer = delete_and_renumber(self.output_dir, failed_problems, existing_problems, failed_problems_after_Ctrl_C, self.planner_progress_manager.progress_path)
-
-                    existing_problems = read_failed_problems_file(failed_problems_after_Ctrl_C)     # Read all the failed problems until now
-                    fp_progress = len(existing_problems)   # Total number of failed problems
-                    update_fp_progress(self.planner_progress_manager.progress_path, fp_progress)     # Update fp_progress
-
-                    # Calculate statistics
-                    avg_time, min_time, max_time, median_time, std_dev = calculate_statistics(execution_times)
-
-                    # Save data in '/results' with pickle
-                    pickle_file_path = os.path.join(results_dir_path,"execution_times.pkl")
-                    with open(pickle_file_path, "wb") as file:  # "wb" = write binary
-                        pickle.dump(execution_times, file)
-                    print(f"Times saved in: {pickle_file_path}")
-
-                    # Time required for the processing
-                    t = pbar.format_dict['elapsed']
-                    # Use divmod to calculate hours, minutes and seconds
-                    minutes, seconds = divmod(t, 60)
-                    hours, minutes = divmod(minutes, 60)
-                    
-                    # Count generated plans to save progress
-                    last_plan = read_plans(plans_dir_path)
-                    self.planner_progress_manager.save_progress(last_plan)
-
-                    # Update the progress of generated problems
-                    if answer == "1" or answer == "2":
-                        update_npg_progress(last_plan, self.planner_progress_manager.progress_path)
-
-                    # Generate log file
-                    self.planner_logs_manager.generate_log_file(
-                        i, p_failed, fp_progress, plans_dir_path, hours, minutes, seconds, avg_time, min_time, max_time, median_time, std_dev)
-                    
-                    # Final output for the user
-                    final_output(i, p_failed, fp_progress, plans_dir_path, hours, minutes, seconds, avg_time, min_time, max_time, median_time, std_dev)
+                    # Post-processing, statistics and final output from the state reached by the generation loop
+                    self._finalize(self.execution_times, plans_dir_path, results_dir_path, self.pbar, self.processed, existing_problems, failed_problems_after_Ctrl_C)
                     break
                 else:
                     print("Choice not valid. Type 'y' or 'n'!")
 
+    def _restore_journal(self, problems_paths, ppg):
+        """
+        Restores the state of a processing that ended without saving its progress.
+
+        The execution times, the failed problems and the progress counter are rebuilt
+        from the journal, so the processing resumes after the last recorded problem.
+
+        Args:
+            problems_paths (list): List of paths to problem files.
+            ppg (int): Number of plans generated according to the progress file.
+
+        Returns:
+            ppg (int): Index of the first problem not processed yet.
+        """
+        for entry in self.planner_progress_manager.read_journal():
+            if entry["exec_time"] is not None:
+                self.execution_times.append(entry["exec_time"])
+            if entry.get("failed", False):
+                self.p_failed += 1
+                self.failed_problems.append(Path(problems_paths[entry["i"]]).name)
+            ppg = entry["i"] + 1
+        return ppg
+
+    def _run_generation_loop(self, problems_paths, ppg, domain_path, plans_dir_path, domain):
+        """
+        Runs the planner and Validate on every problem not processed yet.
+
+        The loop state (progress bar, counters and lists) is kept on the instance,
+        so it is still available if the processing is stopped with 'Ctrl + C'.
+
+        Args:
+            problems_paths (list): List of paths to problem files.
+            ppg (int): Number of plans previously generated (a progress counter).
+            domain_path (str): Path to the domain file.
+            plans_dir_path (str): Directory where generated plans will be stored.
+            domain: The domain object used for planning.
+
+        Returns:
+            tuple: (execution_times, processed) where processed is the number of problems processed,
+                   those restored from the journal included.
+        """
+        self.processed = ppg    # Problems already processed, even if the loop has nothing left to do
+
+        # Planner command line shared by every problem (probe parses the options with getopt, so the order does not matter)
+        base_argv = [self.planner_path, "-d", domain_path, "-o", plans_dir_path]
+
+        # Add the Progress Bar
+        with tqdm(initial=ppg, total=self.num_problems, leave=True, desc="Generating plans", unit=" plan") as self.pbar:
+            # Processing
+            for i, problem in enumerate(problems_paths[ppg:], start=ppg):
+                n_times, n_failed = len(self.execution_times), self.p_failed
+                self.failed_problems, self.p_failed, new_name, self.execution_times = choose_planner(
+                    self.planner, base_argv, problem,
+                    self.output_dir, domain, i, self.p_failed, self.execution_times, self.failed_problems)
+                self.failed_problems, self.p_failed = check_val_and_move(
+                    self.validate_path, domain_path, problem, new_name, plans_dir_path, self.p_failed, self.failed_problems)
+
+                # Record the outcome of the problem in the journal
+                failed = self.p_failed > n_failed   # Only problems counted as failed by this run
+                plan = f"{Path(new_name).stem}.plan" if new_name is not None and not failed else None
+                exec_time = self.execution_times.values[-1] if len(self.execution_times) > n_times else None
+                self.planner_progress_manager.append_journal(i, plan, exec_time, failed)
+                self.pbar.update(1) # Update the Progress Bar
+                self.processed = i + 1
+
+        return self.execution_times, self.processed
+
+    def _finalize(self, execution_times, plans_dir_path, results_dir_path, pbar, processed, existing_problems, failed_problems_after_Ctrl_C):
+        """
+        Post-processes the generated plans and reports the statistics of the processing.
+
+        Converts the plans to IPC format, handles the failed problems, saves the execution
+        times and the progress, then writes the log file and the final output.
+
+        Args:
+            execution_times (RunningStats): Accumulator of the collected execution times.
+            plans_dir_path (str): Directory where generated plans are stored.
+            results_dir_path (str): Directory where results will be saved.
+            pbar (tqdm): Progress bar used to measure the time required for the processing.
+            processed (int): Number of generated problems considered.
+            existing_problems (set): Failed problems found before this interaction.
+            failed_problems_after_Ctrl_C (str): Path to the failed_problems file.
+        """
+        progress_path = self.planner_progress_manager.progress_path
+
+        # Convert to IPC format the plans not converted yet (e.g. after an interruption)
+        convert_to_IPC_format(plans_dir_path)
+
+        # Check failed problems, delete and renumber
+        answer = delete_and_renumber(self.output_dir, self.failed_problems, existing_problems, failed_problems_after_Ctrl_C, progress_path, self.on_failed, self.verbose)
+
+        existing_problems = read_failed_problems_file(failed_problems_after_Ctrl_C)     # Read all the failed problems until now
+        fp_progress = len(existing_problems)   # Total number of failed problems
+        update_fp_progress(progress_path, fp_progress)     # Update fp_progress
+
+        # Calculate statistics
+        avg_time, min_time, max_time, median_time, std_dev = calculate_statistics(execution_times)
+
+        # Save data in '/results' as a float64 NumPy array (loadable with np.load),
+        # in background while the log file and the final output are written
+        times_saved = _IO_EXECUTOR.submit(np.save, self.times_file_path, execution_times.as_array())
+
+        # Time required for the processing
+        t = pbar.format_dict['elapsed']
+        # Use divmod to calculate hours, minutes and seconds
+        minutes, seconds = divmod(t, 60)
+        hours, minutes = divmod(minutes, 60)
+
+        # Count generated plans to save progress
+        last_plan = read_plans(plans_dir_path) or 0     # No plans found: nothing generated yet
+        self.planner_progress_manager.save_progress(last_plan)
+        self.planner_progress_manager.clear_journal()   # The journal is now stored in the progress file
+
+        # Update the progress of generated problems
+        if answer == "1" or answer == "2":
+            update_npg_progress(last_plan, progress_path)
+
+        # Generate log file
+        self.planner_logs_manager.generate_log_file(
+            processed, self.p_failed, fp_progress, plans_dir_path, hours, minutes, seconds, avg_time, min_time, max_time, median_time, std_dev)
+
+        # Wait for the background save before reporting it (raises if the save failed)
+        times_saved.result()
+        print(f"Times saved in: {self.times_file_path}")
+
+        # Final output for the user
+        final_output(processed, self.p_failed, fp_progress, plans_dir_path, hours, minutes, seconds, avg_time, min_time, max_time, median_time, std_dev)
+
 def load_domain(domain_path):
     """
     Loads a PDDL domain from a specified file.
@@ -231,27 +290,26 @@ def load_domain(domain_path):
     """
     with open(domain_path, 'r') as file:
         content = file.read()
-        if ":functions" in content:
-            raise SystemExit("This domain is not valid because it has instances of 'numeric fluents'!")
-        else:
-            domain = parse_domain(domain_path)
+    if ":functions" in content:
+        raise SystemExit("This domain is not valid because it has instances of 'numeric fluents'!")
+
+    # Parse the content already read instead of reading the file again
+    domain = DomainParser()(content)
     return domain
 
-def choose_planner(planner, planner_path, domain_path, problem_path, plans_dir_path, output_dir, domain, i, p_failed, execution_times, failed_problems):
+def choose_planner(planner, base_argv, problem_path, output_dir, domain, i, p_failed, execution_times, failed_problems):
     """
     Chooses the planner to execute based on the specified planner type.
     
     Args:
         planner (str): The planner to use (e.g., "probe").
-        planner_path (str): Path to the planner executable.
-        domain_path (str): Path to the domain file.
+        base_argv (list): Planner command line without the problem (executable, domain and output options).
         problem_path (str): Path to the problem file.
-        plans_dir_path (str): Directory where plans will be stored.
         output_dir (str): Directory for output files.
         domain: The domain object used for planning.
         i (int): Index of the current problem.
         p_failed (int): Number of plans that failed.
-        execution_times (list): List to collect execution times.
+        execution_times (RunningStats): Accumulator to collect execution times.
         failed_problems (list): List to collect failed problems.
         
     Returns:
@@ -260,22 +318,30 @@ def choose_planner(planner, planner_path, domain_path, problem_path, plans_dir_p
 
     if planner == "probe":
         try:
-            # Start the external process in non-blocking mode
-            probe_process = subprocess.Popen(
-                [planner_path, "-d", domain_path, "-i", problem_path, "-o", plans_dir_path],
-                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
-            )
-
-            # Retrieve output upon process completion
-            stdout, stderr = probe_process.communicate()
-
-            # Use a regex to extract the value next to "Time"
-            match = re.search(r"Time:\s*([\d.]+)", stdout)
-            if match:
-                time_value = float(match.group(1))  # Convert the value to float
-                execution_times.append(time_value)  # Add the value into the list
-
-            if "SOLUTION" in stdout:
+            time_value = None   # Time reported by the planner
+            solved = False      # True if the planner found a solution
+
+            # Start the external process and scan its output line by line, without keeping it all in memory
+            with subprocess.Popen(
+                base_argv + ["-i", problem_path],
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL   # Bytes output: no decoding pass is needed
+            ) as probe_process:
+                search_time = _TIME_RE.search     # Bound once, it is called for every output line
+                for line in probe_process.stdout:
+                    if solved and time_value is not None:
+                        continue    # Everything needed has been found: only drain the pipe
+                    # Use a regex to extract the value next to "Time"
+                    if time_value is None:
+                        match = search_time(line)
+                        if match:
+                            time_value = float(match.group(1))  # Convert the value to float
+                    if not solved and b"SOLUTION" in line:
+                        solved = True
+
+            if time_value is not None:
+                execution_times.append(time_value)  # Add the value into the accumulator
+
+            if solved:
                 new_name = rename_plan(output_dir, domain, i)   # Rename the plan
             else:
                 # Increase p_failed counter and add the failed problem to the list
@@ -314,18 +380,22 @@ def check_val_and_move(validate_path, domain_path, problem_path, new_name, plans
     """
     if new_name is not None:
         try:
-            # Start the external process in non-blocking mode
-            process = subprocess.Popen(
-                [validate_path, domain_path, problem_path, new_name],
-                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
-            )
-
-            # Retrieve output upon process completion
-            stdout, stderr = process.communicate()
+            valid = False   # True if Validate accepted the plan
 
-            # Check if "success" is in the command output
-            if "Successful" in stdout:
-                shutil.move(new_name, plans_dir_path)   # Move the plan to '/plans'
+            # Start the external process and scan its output line by line, without keeping it all in memory.
+            # Validate accepts several plans but only for a single problem, so each plan needs its own call
+            with subprocess.Popen(
+                [validate_path, domain_path, problem_path, new_name],
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL   # Bytes output: no decoding pass is needed
+            ) as process:
+                for line in process.stdout:
+                    # Check if "success" is in the command output, then only drain the pipe
+                    if not valid and b"Successful" in line:
+                        valid = True
+
+            if valid:
+                plan_path = shutil.move(new_name, plans_dir_path)   # Move the plan to '/plans'
+                convert_plan_to_IPC_format(plan_path)   # Convert the plan to IPC format right away, not in a final pass
             else:
                 # Delete the plan, increase p_failed counter and add the failed problem to the list
                 os.remove(new_name)
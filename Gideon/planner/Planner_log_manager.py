@@ -1,5 +1,5 @@
 # Import necessary libraries
-import datetime
+import time
 import os
 
 # Project metadata
@@ -48,20 +48,22 @@ class Planner_Log_Manager:
             std_dev (float): Standard deviation of planning times.
         """
         # Generate timestamp for log filename
-        current_date = datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+        current_date = time.strftime('%Y-%m-%d_%H-%M-%S')
         log_filename = f"planning_{current_date}.log"
         log_file_path = os.path.join(self.logs_path, log_filename)
         
-        # Write generation statistics to log file
+        # Write generation statistics to log file, with a single write
         with open(log_file_path, 'w') as log_file:
-            log_file.write(f"Number of generated problems considered: {i}\n")
-            log_file.write(f"Number of plans failed: {p_failed}\n")
-            log_file.write(f"Total of plans failed: {fp_progress}\n")
-            log_file.write(f"Directory of generated plans: {plans_dir_path}\n")
-            log_file.write(f"Time required to generate plans: {int(hours)}h {int(minutes)}m {seconds:.2f}s\n")
-            log_file.write("\n ----- Times for planning -----\n")
-            log_file.write(f"Average Time: {avg_time:.2f} seconds\n")
-            log_file.write(f"Min Time: {min_time:.2f} seconds\n")
-            log_file.write(f"Max Time: {max_time:.2f} seconds\n")
-            log_file.write(f"Median Time: {median_time:.2f} seconds\n")
-            log_file.write(f"Standard Deviation: {std_dev:.2f} seconds")
\ No newline at end of file
+            log_file.write(
+                f"Number of generated problems considered: {i}\n"
+                f"Number of plans failed: {p_failed}\n"
+                f"Total of plans failed: {fp_progress}\n"
+                f"Directory of generated plans: {plans_dir_path}\n"
+                f"Time required to generate plans: {int(hours)}h {int(minutes)}m {seconds:.2f}s\n"
+                "\n ----- Times for planning -----\n"
+                f"Average Time: {avg_time:.2f} seconds\n"
+                f"Min Time: {min_time:.2f} seconds\n"
+                f"Max Time: {max_time:.2f} seconds\n"
+                f"Median Time: {median_time:.2f} seconds\n"
+                f"Standard Deviation: {std_dev:.2f} seconds"
+            )
\ No newline at end of file
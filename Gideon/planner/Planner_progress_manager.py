@@ -1,6 +1,9 @@
 # Import necessary libraries
 import os
 import re
+import sys
+import json
+import atexit       # To close the progress file descriptor on exit
 
 # Project metadata
 __author__ = "Nicholas Attolino"
@@ -11,12 +14,17 @@ __maintainer__ = "Nicholas Attolino"
 __email__ = "nicholasattolino@gmail.com"
 __status__ = "Development"
 
+# Line containing 'ppg_progress' in the progress file
+_PPG_RE = re.compile(rb"ppg_progress\s*=\s*(\d+)")
+_PPG_LINE_RE = re.compile(rb"^ppg_progress = .*$", re.M)   # Whole row, to be rewritten
+
 class Planner_Progress_Manager:
     """
     Manager class for handling generation progress tracking.
     
     Attributes:
         progress_path (str): Path to the progress file
+        journal_path (str): Path to the append-only journal of the processed problems
     """
 
     def __init__(self, progress_path):
@@ -27,29 +35,43 @@ class Planner_Progress_Manager:
             planner_progress_path (str): Path where progress file will be stored
         """
         self.progress_path = progress_path
+        self.journal_path = os.path.splitext(progress_path)[0] + ".jsonl"   # 'progress.jsonl' next to 'progress.txt'
+        self._cached_ppg = None     # Last ppg value read from or written to the progress file
+        self._cached_mtime = None   # Modification time of the progress file when the cache was filled
+        self._journal_file = None   # Journal kept open between the appends, opened at the first one
+        self._fd = None             # Descriptor of the progress file kept open between the saves, opened at the first one
     
     def save_progress(self, plan_count):
         """
         Saves the current progress to the specified file.
         Writes the current number of generated plans to the progress file.
+
+        The file holds the other progress values too, so it is read and rewritten
+        whole, through a descriptor kept open instead of opening it twice per save.
         
         Args:
-            plan_count (int): Current number of plans generated.
+            plan_count (int): Current number of plans generated, or None if there are none.
         """
+        plan_count = plan_count or 0    # read_plans() returns None when no plan was generated
+
+        if self._fd is None:
+            self._fd = os.open(self.progress_path, os.O_RDWR)
+            atexit.register(os.close, self._fd)
+        fd = self._fd
+
         # Read the content of the file
-        with open(self.progress_path, 'r') as file:
-            lines = file.readlines()
-
-        # Search the row that contains 'ppg_progress ='
-        for l, line in enumerate(lines):
-            if line.startswith("ppg_progress = "):
-                # Rewrite the value with the new one
-                lines[l] = f"ppg_progress = {plan_count}\n"
-                break
-        
+        content = os.pread(fd, os.fstat(fd).st_size, 0)
+
+        # Rewrite the row that contains 'ppg_progress =' with the new value
+        content = _PPG_LINE_RE.sub(b"ppg_progress = %d" % plan_count, content, count=1)
+
         # Rewrite the file with the new value
-        with open(self.progress_path, 'w') as file:
-            file.writelines(lines)
+        os.pwrite(fd, content, 0)
+        os.ftruncate(fd, len(content))
+
+        # Keep the cache aligned with the value just written
+        self._cached_ppg = plan_count
+        self._cached_mtime = os.fstat(fd).st_mtime_ns
 
     def read_progress(self):
         """
@@ -58,36 +80,104 @@ class Planner_Progress_Manager:
         Returns:
             Value (int): Number of plans previously generated, or 0 if no progress file exists.
         """
-        # Define a regex pattern to match the line containing 'ppg_progress'
-        pattern = r"ppg_progress\s*=\s*(\d+)"
-        
-        # Check if the progress file exists
-        if os.path.exists(self.progress_path):
-            with open(self.progress_path, 'r') as f:
-                content = f.read()
-                
-                # Search for the pattern in the file content
-                match = re.search(pattern, content)
-                if match:
-                    # If a match is found, return the captured number (group 1)
-                    return int(match.group(1))
-        # Return 0 if no progress file exists or no match is found
-        return 0
+        # A single stat tells both if the progress file exists and if it has changed
+        try:
+            mtime = os.stat(self.progress_path).st_mtime_ns
+        except FileNotFoundError:
+            return 0    # Return 0 if no progress file exists
+
+        # Return the cached value if the file has not changed since the last read
+        if mtime == self._cached_mtime:
+            return self._cached_ppg
+
+        # Read the raw bytes, there is no need to decode the whole file
+        with open(self.progress_path, 'rb') as f:
+            content = f.read()
+
+        # Search for the pattern in the file content
+        match = _PPG_RE.search(content)
+        # If a match is found, take the captured number (group 1)
+        self._cached_ppg = int(match.group(1)) if match else 0
+        self._cached_mtime = mtime
+        return self._cached_ppg
         
-    def check_progress(self, plans_path, output_dir):
+    def append_journal(self, i, plan, exec_time, failed=False):
+        """
+        Appends the outcome of a processed problem to the journal.
+
+        The journal is written once per problem, so the state of a processing that
+        ended without the final save (e.g. a crash) can be rebuilt on resume.
+        The file stays open and line buffered: each entry costs a single write
+        instead of an open, a write and a close.
+
+        Args:
+            i (int): Index of the processed problem.
+            plan (str): Name of the generated plan, or None if the problem failed.
+            exec_time (float): Time reported by the planner, or None if not available.
+            failed (bool): Whether the problem was counted as failed during the processing.
+        """
+        if self._journal_file is None:
+            self._journal_file = open(self.journal_path, 'a', buffering=1)
+        self._journal_file.write(json.dumps({"i": i, "plan": plan, "exec_time": exec_time, "failed": failed}) + "\n")
+
+    def read_journal(self):
+        """
+        Reads the problems recorded in the journal since the last saved progress.
+
+        Returns:
+            entries (list): List of dictionaries with keys 'i', 'plan' and 'exec_time'.
+        """
+        entries = []
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'r') as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        break   # A truncated last line means the crash happened while writing it
+        return entries
+
+    def clear_journal(self):
+        """
+        Removes the journal once its content is stored in the progress file.
+        """
+        if self._journal_file is not None:
+            self._journal_file.close()
+            self._journal_file = None
+        try:
+            os.unlink(self.journal_path)
+        except FileNotFoundError:
+            pass
+
+    def check_progress(self, plans_path, output_dir, resume="auto"):
         """
         Checks for existing progress and handles user interaction.
         
         Prompts the user to decide whether to resume from previous progress
-        or start fresh generation.
+        or start fresh generation, unless the decision is already given.
         
         Args:
             plans_path (str): Path to the generated plans directory.
             output_dir (str): Path to the output directory.
+            resume (str): 'yes' to resume, 'no' to start fresh, 'auto' to ask the user
+                          on a terminal and resume the saved progress otherwise (e.g. batch runs).
             
         Returns:
             ppg (int): Number of plans generated (a progress counter).
         """
+        # Without a terminal nobody can answer: resume the saved progress, if any
+        if resume == "auto" and not sys.stdin.isatty():
+            resume = "yes"
+
+        if resume == "yes":
+            if os.path.exists(plans_path) and os.path.exists(output_dir):
+                return self.read_progress()
+            self.clear_journal()    # Nothing to resume: a leftover journal must not override the progress
+            return 0
+        elif resume == "no":
+            self.clear_journal()    # Start fresh: forget problems of a previous processing
+            return 0
+
         while True:
             print("Is there a stopped processing in advance? (Y for yes, N for no)")
             answer = input().strip().upper()        
@@ -96,6 +186,7 @@ class Planner_Progress_Manager:
                     ppg = self.read_progress()
                     return ppg
             elif answer == "N":
+                self.clear_journal()    # Start fresh: forget problems of a previous processing
                 return 0
             else:
                 print("Invalid input, please enter 'Y' for yes or 'N' for no.")
\ No newline at end of file
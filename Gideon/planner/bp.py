@@ -48,7 +48,10 @@ def main(args):
         planner_logs_manager,
         args.planner,
         planner_path,
-        validate_path
+        validate_path,
+        resume=args.resume,
+        on_failed=args.on_failed,
+        verbose=args.verbose
     )
     
     # Generate plans
@@ -61,6 +64,11 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Generate random instances of PDDL problem files')
     parser.add_argument('-o','--output_dir', type=str, help='Output path of PDDL problem files')
     parser.add_argument('-c', '--planner', choices=['probe'], default='probe', help='Choose which planner to use')
+    parser.add_argument('--resume', choices=['yes', 'no', 'auto'], default='auto',
+                        help="Resume a stopped processing: 'auto' asks on a terminal and resumes otherwise")
+    parser.add_argument('--on-failed', choices=['delete', 'delete-total', 'keep', 'auto'], default='auto',
+                        help="Failed problems: delete those of this run or all of them, or keep them; 'auto' asks on a terminal and keeps them otherwise")
+    parser.add_argument('-v', '--verbose', action='store_true', help='Report the intermediate steps of the post-processing')
     args = parser.parse_args()
 
     # Launch main function
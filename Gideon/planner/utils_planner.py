@@ -1,8 +1,11 @@
 # Import necessary libraries
 import os
 import re               # To renumber each file
+import sys              # To print the final output with a single write
 import numpy as np      # To calculate statistics
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor   # To rewrite the renumbered problems concurrently
+import threading        # To extend the shared timing prefixes safely
 
 # Project metadata
 __author__ = "Nicholas Attolino"
@@ -13,6 +16,114 @@ __maintainer__ = "Nicholas Attolino"
 __email__ = "nicholasattolino@gmail.com"
 __status__ = "Development"
 
+# Regex patterns compiled once at import time
+_PROBLEM_NUM_RE = re.compile(r'problem_(\d+)')                        # Number of a problem file
+_PLAN_NUM_RE = re.compile(r'_(\d+)\.plan$')                           # Number of a plan file
+_TRAILING_NUM_RE = re.compile(r'_(\d+)\.')                            # Number before the extension
+_PREFIX_RE = re.compile(r'^(.*_)\d+\.')                               # Prefix before the number
+_DEFINE_RE = re.compile(rb'\(define \(problem [^\)]+\)')              # Problem definition (on bytes)
+_HASH_IDX_RE = re.compile(r'_(\d+)\.(?:pddl|plan)')                   # Index of a problem in the hash list
+_FP_PROGRESS_RE = re.compile(r"failed_problems_progress\s*=\s*(\d+)")  # Failed problems progress value
+
+_HEADER_SIZE = 1024     # Bytes read to look for the problem definition
+
+# Choice of delete_and_renumber() for each '--on-failed' value given on the command line
+_ON_FAILED_CHOICES = {"delete": "1", "delete-total": "2", "keep": "3"}
+
+# Timing prefixes of the IPC plans, formatted once and shared by all the conversions
+_TIMING_PREFIXES = []
+_TIMING_PREFIXES_LOCK = threading.Lock()
+
+def _file_number(name, pattern):
+    """
+    Extracts the number of a numbered file name (e.g. 'domain_problem_000012.pddl' -> 12)
+    with a slice between the last '_' and the following '.', using the regex only as a fallback.
+    
+    Args:
+        name (str): The file name.
+        pattern (re.Pattern): The regex whose first group captures the number, used if slicing fails.
+        
+    Returns:
+        int: The number in the file name.
+    """
+    try:
+        start = name.rindex('_') + 1
+        return int(name[start:name.index('.', start)])
+    except ValueError:
+        return int(pattern.search(name).group(1))
+
+class RunningStats:
+    """
+    Collects execution times keeping running statistics, so that they are
+    updated in O(1) for each new value instead of walking the whole list again.
+    Mean and variance use Welford's online update, which stays accurate when the
+    values are large and close together (unlike the sum of the squares).
+
+    Attributes:
+        n (int): Number of collected values.
+        _mean (float): Running mean of the collected values.
+        _m2 (float): Running sum of the squared deviations from the mean.
+        min (float): Minimum collected value.
+        max (float): Maximum collected value.
+        values (list): Raw collected values, needed for the median and to save the times.
+    """
+    def __init__(self):
+        """
+        Initializes an empty accumulator.
+        """
+        self.n = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self.min = None
+        self.max = None
+        self.values = []
+        self._array = None     # Cached NumPy array of the values
+
+    def append(self, value):
+        """
+        Adds a new value and updates the running statistics.
+
+        Args:
+            value (float): The execution time to add.
+        """
+        self.n += 1
+        delta = value - self._mean
+        self._mean += delta / self.n
+        self._m2 += delta * (value - self._mean)     # Welford's update
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        self.values.append(value)
+
+    def __len__(self):
+        """Returns the number of collected values."""
+        return self.n
+
+    def mean(self):
+        """Returns the average of the collected values."""
+        return self._mean
+
+    def std(self):
+        """Returns the (population) standard deviation of the collected values."""
+        return np.sqrt(self._m2 / self.n)
+
+    def as_array(self):
+        """
+        Returns the collected values as a float64 NumPy array, converting the list
+        only once until new values are added.
+
+        Returns:
+            np.ndarray: The collected values.
+        """
+        if self._array is None or len(self._array) != self.n:
+            self._array = np.asarray(self.values, dtype=np.float64)
+        return self._array
+
+    def median(self):
+        """Returns the median of the collected values."""
+        return np.median(self.as_array())
+
 class Planner_Structure:
     def __init__(self, output_dir):
         """
@@ -30,17 +141,19 @@ class Planner_Structure:
         Returns:
             tuple: Contains paths for domain, problems, logs, plans, progress file, and results directory.
         """
-        # Create a Path object for the directory
-        dir_path = Path(self.output_dir)
-
-        # Search for files in the directory
-        for file in dir_path.iterdir():
-            if file.is_file() and file.name.startswith("domain"):
-                domain_path = str(file)
-            elif file.is_dir() and file.name == "problems":
-                problems_dir_path = str(file)
-            elif file.is_dir() and file.name == "logs":
-                logs_dir_path = str(file)
+        domain_path = problems_dir_path = logs_dir_path = None
+
+        # Search for files in the directory, stopping as soon as everything needed has been found
+        with os.scandir(self.output_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith("domain") and entry.is_file():
+                    domain_path = entry.path
+                elif entry.name == "problems" and entry.is_dir():
+                    problems_dir_path = entry.path
+                elif entry.name == "logs" and entry.is_dir():
+                    logs_dir_path = entry.path
+                if domain_path and problems_dir_path and logs_dir_path:
+                    break
 
         # Generate plans folder
         plans_folder_name = 'plans'
@@ -74,22 +187,17 @@ def read_problems(problems_dir_path):
     Returns:
         tuple: Contains the count of problem files and a list of their paths.
     """
+    # Iterate over files in the folder (without subfolders), using the file type cached by scandir,
+    # and pair each path with the numeric part of its name while the name is at hand
+    with os.scandir(problems_dir_path) as entries:
+        keyed = [(_file_number(entry.name, _PROBLEM_NUM_RE), entry.path) for entry in entries if entry.is_file()]
+
     # Counter for the number of files
-    problem_count = 0
-    problems_paths = []    # List of paths for each problem file
-
-    # Iterate over files in the folder (without subfolders)
-    for problem in os.listdir(problems_dir_path):
-        problem_path = os.path.join(problems_dir_path, problem)
-        if os.path.isfile(problem_path):  # Check if it is a file
-            problems_paths.append(problem_path)
-            problem_count += 1
-
-    # Sort the list based on the numeric part of the file name
-    problems_paths = sorted(
-        problems_paths,
-        key=lambda x: int(re.search(r'problem_(\d+)', os.path.basename(x)).group(1))
-    )
+    problem_count = len(keyed)
+
+    # Sort on the precomputed numbers and keep only the paths
+    keyed.sort()
+    problems_paths = [path for _, path in keyed]
     return problem_count, problems_paths
 
 def read_plans(plans_dir_path):
@@ -102,18 +210,10 @@ def read_plans(plans_dir_path):
     Returns:
         last_plan (int): The number of the last generated plan.
     """
-    numbers = []    # Empty list for the numbers of plans
-    files = Path(plans_dir_path).glob("*.plan") # Groups the files into "/plans" directory
-
-    for plan in files:
-        match = re.search(r'_(\d+)\.plan$', plan.name)  # Regex on numbers of the plans
-        if match:
-            numbers.append(int(match.group(1)))
-    
-    if not numbers:
-        return None  # No plans found
-    
-    last_plan = max(numbers)    # Takes the biggest number (is the same number of the last generated plan)
+    # Take the biggest plan number (is the same number of the last generated plan) without building a list
+    with os.scandir(plans_dir_path) as entries:
+        matches = (_PLAN_NUM_RE.search(entry.name) for entry in entries if entry.name.endswith(".plan"))
+        last_plan = max((int(match.group(1)) for match in matches if match), default=None)    # None if no plans found
     return last_plan
 
 def rename_plan(output_dir, domain, i):
@@ -128,18 +228,15 @@ def rename_plan(output_dir, domain, i):
     Returns:
         Path: The new path of the renamed plan file.
     """
-    # Create a Path object for the directory
-    dir_path = Path(output_dir)
-    search_string = ".1"
+    # The planner appends the ".1" suffix to the plan it writes
+    suffix = ".1"
 
-    # Search for files in the directory
-    for file in dir_path.iterdir():
-        if file.is_file() and (search_string in file.name):
-            plan_path = Path(file)
-            break
+    # Search for the plan file in the directory
+    with os.scandir(output_dir) as entries:
+        plan_path = next(Path(entry.path) for entry in entries if entry.is_file() and entry.name.endswith(suffix))
     
     # Set a new name as the original path + the new name for the file
-    new_name = plan_path.parent / f"{domain.name}_problem_00000{i+1}.pddl"
+    new_name = plan_path.parent / f"{domain.name}_problem_{i+1:06d}.pddl"
     plan_path.rename(new_name)
     return new_name
 
@@ -150,30 +247,59 @@ def convert_to_IPC_format(plans_dir_path):
     Args:
         plans_dir_path (str): The path to the directory containing plan files.
     """
-    plan_files = sorted([f for f in os.listdir(plans_dir_path) if f.endswith(".pddl")])
+    with os.scandir(plans_dir_path) as entries:
+        plan_files = [entry.path for entry in entries if entry.name.endswith(".pddl") and entry.is_file()]
 
-    for i, plan in enumerate(plan_files):
-        # Open the original file
-        file_origin_path = os.path.join(plans_dir_path, plan)
-        file_origin = open(file_origin_path, "r")
-        
-        # Create the new file with the correct name
-        new_file_path = os.path.join(plans_dir_path, plan.split(".")[0] + ".plan")
-        new_file = open(new_file_path, 'w+')
+    # Each plan is converted independently and the work is I/O bound, so the conversions are overlapped on a thread pool
+    if plan_files:
+        with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as executor:
+            list(executor.map(convert_plan_to_IPC_format, plan_files))
+
+def _timing_prefixes(n):
+    """
+    Returns the table of IPC timing prefixes (b"0.00100: ", b"0.00300: ", ...), extending it if
+    it has fewer than n entries, so that each prefix is formatted only once per run.
+    
+    Args:
+        n (int): The number of prefixes needed.
         
-        action_timing = 1
-        for line in file_origin:
-            line = line.lower()
-            line = '%.3f' % (action_timing / 1000) + "00: " + line
-            new_file.write(line)
-            action_timing += 2
+    Returns:
+        list: The table of timing prefixes (as bytes), with at least n entries.
+    """
+    if len(_TIMING_PREFIXES) < n:
+        with _TIMING_PREFIXES_LOCK:     # Plans are converted by several threads
+            for t in range(len(_TIMING_PREFIXES), n):
+                _TIMING_PREFIXES.append(f"{(1 + 2 * t) / 1000:.5f}: ".encode())
+    return _TIMING_PREFIXES
 
-        file_origin.close()
-        new_file.close()
+def convert_plan_to_IPC_format(file_origin_path):
+    """
+    Converts a single plan file to IPC format and removes the original PDDL file.
+    
+    Args:
+        file_origin_path (str): The path to the plan file to convert.
+        
+    Returns:
+        new_file_path (str): The path of the converted plan file.
+    """
+    # Read the whole original file at once, as bytes: plans are ASCII, so no decoding pass is needed
+    with open(file_origin_path, "rb") as file_origin:
+        lines = file_origin.read().lower().splitlines(keepends=True)
+    
+    # Create the new file with the correct name
+    plans_dir_path, plan = os.path.split(file_origin_path)
+    new_file_path = os.path.join(plans_dir_path, plan.split(".")[0] + ".plan")
+    
+    # Prefix each action with its timing (1, 3, 5, ... milliseconds) and write everything in one call,
+    # into a temporary file so that a crash never leaves a truncated plan behind
+    prefixes = _timing_prefixes(len(lines))
+    tmp_file_path = new_file_path + ".tmp"
+    with open(tmp_file_path, 'wb') as new_file:
+        new_file.write(b"".join([prefix + line for prefix, line in zip(prefixes, lines)]))
 
-        # Check if the file ends with ".pddl" and if it is a file
-        if plan.endswith(".pddl") and os.path.isfile(file_origin_path):
-            os.remove(file_origin_path)  # Remove the original file
+    os.replace(tmp_file_path, new_file_path)    # Atomically move the converted plan in place
+    os.unlink(file_origin_path)                 # Remove the original file
+    return new_file_path
 
 def final_output(i, p_failed, fp_progress, plans_dir_path, hours, minutes, seconds, avg_time, min_time, max_time, median_time, std_dev):
     """
@@ -191,125 +317,141 @@ def final_output(i, p_failed, fp_progress, plans_dir_path, hours, minutes, secon
         median_time (float): Median time taken for planning.
         std_dev (float): Standard deviation of planning times.
     """
-    print(f"Number of generated problems considered: {i}")
-    print(f"Number of plans failed in this interaction: {p_failed}")
-    print(f"Total of plans failed: {fp_progress}")
-    print(f"Directory of generated plans: {plans_dir_path}")
-    print(f"Time required to generate plans: {int(hours)}h {int(minutes)}m {seconds:.2f}s")
-    print("\n ----- Times for planning -----\n")
-    print(f"Average Time: {avg_time:.2f} seconds")
-    print(f"Min Time: {min_time:.2f} seconds")
-    print(f"Max Time: {max_time:.2f} seconds")
-    print(f"Median Time: {median_time:.2f} seconds")
-    print(f"Standard Deviation: {std_dev:.2f} seconds")
+    # Whole summary with a single write to stdout
+    sys.stdout.write(
+        f"Number of generated problems considered: {i}\n"
+        f"Number of plans failed in this interaction: {p_failed}\n"
+        f"Total of plans failed: {fp_progress}\n"
+        f"Directory of generated plans: {plans_dir_path}\n"
+        f"Time required to generate plans: {int(hours)}h {int(minutes)}m {seconds:.2f}s\n"
+        "\n ----- Times for planning -----\n\n"
+        f"Average Time: {avg_time:.2f} seconds\n"
+        f"Min Time: {min_time:.2f} seconds\n"
+        f"Max Time: {max_time:.2f} seconds\n"
+        f"Median Time: {median_time:.2f} seconds\n"
+        f"Standard Deviation: {std_dev:.2f} seconds\n"
+    )
 
 def calculate_statistics(execution_times):
     """
     Calculates statistical metrics from execution times.
     
     Args:
-        execution_times (list): List of execution times.
+        execution_times (RunningStats): Accumulator of the execution times.
         
     Returns:
         tuple: Contains average, minimum, maximum, median, and standard deviation of execution times.
     """
     if execution_times:
-        avg_time = np.mean(execution_times)
-        min_time = np.min(execution_times)
-        max_time = np.max(execution_times)
-        median_time = np.median(execution_times)
-        std_dev = np.std(execution_times)
+        avg_time = execution_times.mean()
+        min_time = execution_times.min
+        max_time = execution_times.max
+        median_time = execution_times.median()
+        std_dev = execution_times.std()
 
         return avg_time, min_time, max_time, median_time, std_dev
     else:
         print("No execution times available.")
         return None, None, None, None, None
 
-def delete_and_renumber(output_dir, failed_problems, existing_problems, failed_problems_after_Ctrl_C, progress_path):
+def _safe_unlink(path):
     """
-    Deletes failed problems and renumbers remaining files.
+    Removes a file with a single syscall, ignoring it if it does not exist.
     
     Args:
+        path (str): The path of the file to remove.
+    """
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+def _apply_deletion(targets, existing_problems, output_dir, failed_problems_after_Ctrl_C, progress_path, verbose=False):
+    """
+    Deletes the given problems, renumbers the remaining files and updates the hash list,
+    the failed problems file and the progress file accordingly.
+    
+    Args:
+        targets (list): List of problem file names to be deleted.
+        existing_problems (set): All the failed problem file names recorded until now.
         output_dir (str): The output directory containing all the files.
-        failed_problems (list): List of failed problem file names to be deleted.
-        existing_problems (list): List of all failed problem file names to be deleted.
         failed_problems_after_Ctrl_C (str): Path to the failed problems file.
         progress_path (str): Path to the progress file.
+        verbose (bool): Whether to report the update of the hash list.
     """
     plans_dir = os.path.join(output_dir, "plans")
     problems_dir = os.path.join(output_dir, "problems")
     hash_list_path = os.path.join(output_dir, "hash_list.txt")
+    problems_base = os.path.join(problems_dir, "")     # Problems directory prefix with trailing separator
 
-    # Sort the list based on the numeric part of the file name
-    failed_problems = sorted(
-        failed_problems,
-        key=lambda x: int(re.search(r'problem_(\d+)', os.path.basename(x)).group(1))
-    )
+    # Update the hash list and keep the number of its rows
+    count_rows = update_hash_list(hash_list_path, targets, verbose)
 
-    if failed_problems:
-        print("The following problems have generated wrong plans and are considered failed:")
-        # Record failed problems into a file and show them as output
-        with open (failed_problems_after_Ctrl_C, 'a') as f:
-            for problem in failed_problems:
-                f.write(f"{problem}\n")
-                print(f"- {problem}")
-        existing_problems = read_failed_problems_file(failed_problems_after_Ctrl_C) # Read the failed problems file
-                    
-        while True:
-            # Ask user for a possible choice
-            print("There are 3 options:\n"
-                  "1) Delete 'failed problems from this interaction', renumber plans and problems and 'update the hash list from this interaction'\n"
-                  "2) Delete 'total failed problems', renumber plans and problems and 'update the hash list from total failed problems'\n"
-                  "3) No changes! You will have the plans generated by the respective problems, you will also keep the unplannable problems and if you want to see only them\n"
-                  "but all together, just open the 'total_failed_problems.txt' file\n")
-            choice = input("What do you choose? (1/2/3): ").strip()
-            match choice:
-                case '1':
-                    # Update the hash list
-                    update_hash_list(hash_list_path, failed_problems)
+    # Delete the problem
+    for problem_path in [problems_base + problem for problem in targets]:
+        _safe_unlink(problem_path)
 
-                    # Delete the problem
-                    for problem in failed_problems:
-                        problem_path = os.path.join(problems_dir, problem)
-                        if os.path.exists(problem_path):
-                            os.remove(problem_path)
+    # Renumber all remaining files to eliminate gaps
+    renumber_files(plans_dir, "plan")
+    renumber_files(problems_dir, "pddl")
 
-                    # Renumber all remaining files to eliminate gaps
-                    renumber_files(plans_dir, "plan")
-                    renumber_files(problems_dir, "pddl")
+    # Update failed_problems_file
+    update_failed_problems_file(existing_problems, failed_problems_after_Ctrl_C)
 
-                    # Update failed_problems_file
-                    update_failed_problems_file(existing_problems, failed_problems_after_Ctrl_C)
-                    
-                    # Count rows into the hash_list file
-                    with open(hash_list_path, 'r') as f:
-                        count_rows = sum(1 for _ in f)
-                    # Update hash_list_progress
-                    update_h_progress(progress_path, count_rows)
-                    return choice
+    # Update hash_list_progress
+    update_h_progress(progress_path, count_rows)
+
+def delete_and_renumber(output_dir, failed_problems, existing_problems, failed_problems_after_Ctrl_C, progress_path, on_failed="auto", verbose=False):
+    """
+    Deletes failed problems and renumbers remaining files.
+
+    The choice is asked to the user, unless it is already given: without a terminal
+    nobody can answer, so 'auto' keeps every file (option 3).
+    
+    Args:
+        output_dir (str): The output directory containing all the files.
+        failed_problems (list): List of failed problem file names to be deleted.
+        existing_problems (set): Failed problem file names already recorded in the failed problems file.
+        failed_problems_after_Ctrl_C (str): Path to the failed problems file.
+        progress_path (str): Path to the progress file.
+        on_failed (str): 'delete', 'delete-total' or 'keep' (options 1, 2 and 3), 'auto' to ask on a terminal.
+        verbose (bool): Whether to report the update of the hash list.
 
-                case '2':
-                    # Update the hash list
-                    update_hash_list(hash_list_path, existing_problems)
+    Returns:
+        choice (str): The option applied, or None if no problem failed.
+    """
+    if on_failed == "auto" and not sys.stdin.isatty():
+        on_failed = "keep"
+    choice = _ON_FAILED_CHOICES.get(on_failed)     # None: ask the user
 
-                    # Delete the problem
-                    for problem in existing_problems:
-                        problem_path = os.path.join(problems_dir, problem)
-                        if os.path.exists(problem_path):
-                            os.remove(problem_path)
+    # Sort the list based on the numeric part of the file name, computed once per problem
+    keyed = sorted((int(_PROBLEM_NUM_RE.search(os.path.basename(p)).group(1)), p) for p in failed_problems)
+    failed_problems = [p for _, p in keyed]
 
-                    # Renumber all remaining files to eliminate gaps
-                    renumber_files(plans_dir, "plan")
-                    renumber_files(problems_dir, "pddl")
+    if failed_problems:
+        print("The following problems have generated wrong plans and are considered failed:")
+        # Record failed problems into a file and show them as output; problems restored from
+        # the journal may already be recorded by the interrupted interaction
+        with open (failed_problems_after_Ctrl_C, 'a') as f:
+            f.write("".join(f"{problem}\n" for problem in failed_problems if problem not in existing_problems))
+        print("".join(f"- {problem}\n" for problem in failed_problems), end="")
+        existing_problems = read_failed_problems_file(failed_problems_after_Ctrl_C) # Read the failed problems file
+        # Problems to delete for each option
+        targets = {'1': failed_problems, '2': existing_problems}
 
-                    # Update failed_problems_file
-                    update_failed_problems_file(existing_problems, failed_problems_after_Ctrl_C)
-                    
-                    # Count rows into the hash_list file
-                    with open(hash_list_path, 'r') as f:
-                        count_rows = sum(1 for _ in f)
-                    # Update hash_list_progress
-                    update_h_progress(progress_path, count_rows)
+        while True:
+            if choice is None:
+                # Ask user for a possible choice
+                print("There are 3 options:\n"
+                      "1) Delete 'failed problems from this interaction', renumber plans and problems and 'update the hash list from this interaction'\n"
+                      "2) Delete 'total failed problems', renumber plans and problems and 'update the hash list from total failed problems'\n"
+                      "3) No changes! You will have the plans generated by the respective problems, you will also keep the unplannable problems and if you want to see only them\n"
+                      "but all together, just open the 'total_failed_problems.txt' file\n")
+                choice = input("What do you choose? (1/2/3): ").strip()
+            match choice:
+                case '1' | '2':
+                    # Delete the chosen problems, renumber the remaining files and update hash list and progress
+                    _apply_deletion(targets[choice], existing_problems, output_dir, failed_problems_after_Ctrl_C, progress_path, verbose)
                     return choice
 
                 case '3':
@@ -320,6 +462,7 @@ def delete_and_renumber(output_dir, failed_problems, existing_problems, failed_p
 
                 case _:  # Default case if input is not '1' or '2' or '3'
                     print("Choice not valid. Type '1' or '2' or '3'!")
+                    choice = None   # Ask again
     else:
         print("No failed problems found.")
 
@@ -331,66 +474,100 @@ def renumber_files(directory, extension):
         directory (str): The directory containing files to be renumbered.
         extension (str): The file extension of the files to be renumbered.
     """
-    # Find files in the directory
-    files = sorted(
-        [f for f in os.listdir(directory) if f.endswith(f".{extension}")],
-        key=lambda x: int(re.search(r"_(\d+)\.", x).group(1))  # Extracts the number
-    )
+    # Find files in the directory, paired with their number, and sort them on the precomputed numbers
+    suffix = f".{extension}"
+    with os.scandir(directory) as entries:
+        keyed = [(_file_number(entry.name, _TRAILING_NUM_RE), entry.name, entry.path)
+                 for entry in entries if entry.name.endswith(suffix) and entry.is_file()]
+    keyed.sort()
 
-    for idx, file in enumerate(files, start=1):
-        # Extract the prefix before the number
-        prefix = re.match(r"^(.*_)\d+\.", file).group(1)
-        old_path = os.path.join(directory, file)
+    renamed = []    # (temporary path, new path, new name) of the files that change name
+    base = os.path.join(directory, "")     # Directory prefix with trailing separator, built once
 
-        # Create the index with leading zeros
-        padded_index = f"00000{str(idx)}"
+    # First phase: move the files to renumber to temporary names, so no rename can overwrite a file not renumbered yet
+    for idx, (_, file, file_path) in enumerate(keyed, start=1):
+        # Extract the prefix before the number
+        prefix = _PREFIX_RE.match(file).group(1)
 
-        # New file name
-        new_name = f"{prefix}{padded_index}.{extension}"
-        new_path = os.path.join(directory, new_name)
+        # New file name, with the index zero-padded to a fixed width
+        new_name = f"{prefix}{idx:06d}.{extension}"
+        if new_name == file:
+            continue    # Already numbered correctly: no rename and no rewrite needed
 
-        os.rename(old_path, new_path)  # Rename the file
+        tmp_path = f"{base}.tmp_{idx}.{extension}"
+        os.rename(file_path, tmp_path)
+        renamed.append((tmp_path, base + new_name, new_name))
 
-        if extension == "pddl":
-            # Update the content of the file
-            with open(new_path, 'r') as f:
-                content = f.read()
-            
-            # Look up the problem definition and substitute the name
-            new_problem_name = new_name.rsplit('.', 1)[0]  # Name without extension
-            updated_content = re.sub(
-                r"\(define \(problem [^\)]+\)",  # Regex to find the problem name
-                f"(define (problem {new_problem_name})",  # Change with the new name
-                content
-            )
+    # Second phase: give the final names to the temporary files (renames stay sequential, they change the directory)
+    for tmp_path, new_path, new_name in renamed:
+        os.rename(tmp_path, new_path)  # Rename the file
 
-            # Write the updated content into the file
-            with open(new_path, 'w') as f:
-                f.write(updated_content)
+    if extension == "pddl" and renamed:
+        # The rewrites of the problem definitions are independent and I/O bound, so they are overlapped on a thread pool
+        with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 2)) as executor:
+            list(executor.map(_rewrite_problem_name, [(new_path, new_name) for _, new_path, new_name in renamed]))
 
-def update_hash_list(hash_list_path, failed_problems):
+def _rewrite_problem_name(renamed_problem):
+    """
+    Substitutes the name in the problem definition of a renumbered problem file.
+    
+    Args:
+        renamed_problem (tuple): The new path and the new name of the problem file.
+    """
+    new_path, new_name = renamed_problem
+    new_problem_name = new_name.rsplit('.', 1)[0]  # Name without extension
+    definition = f"(define (problem {new_problem_name})".encode()
+
+    with open(new_path, 'rb+') as f:
+        # The problem definition is at the start of the file, so only its first bytes are read
+        head = f.read(_HEADER_SIZE)
+        match = _DEFINE_RE.search(head)
+        if match and match.end() - match.start() == len(definition):
+            # Same length: overwrite only the definition, in place
+            f.seek(match.start())
+            f.write(definition)
+        else:
+            # Different length (or definition not found in the first bytes): rewrite the whole file
+            content = head + f.read()
+            f.seek(0)
+            f.write(_DEFINE_RE.sub(definition, content))
+            f.truncate()
+
+def update_hash_list(hash_list_path, failed_problems, verbose=False):
     """
     Removes failed problems from the hash list.
     
     Args:
         hash_list_path (str): The path to the hash list file.
         failed_problems (list): List of failed problem file names to be removed from the hash list.
+        verbose (bool): Whether to report the update of the hash list.
+        
+    Returns:
+        int: The number of rows left in the hash list.
     """
     # Read all hashes from the list
-    with open(hash_list_path, 'r') as f:
-        hash_list = f.readlines()
+    hash_list = Path(hash_list_path).read_text().splitlines(keepends=True)
 
-    # Remove hashes of failed problems
-    failed_indices = [int(re.search(r"_(\d+)\.(pddl|plan)", problem).group(1)) - 1 for problem in failed_problems]
+    # Indices of the hashes of failed problems (a set drops the duplicates)
+    failed_indices = {_file_number(problem, _HASH_IDX_RE) - 1 for problem in failed_problems}
 
-    # Filter out non-failed lines
-    hash_list = [hash_list[i] for i in range(len(hash_list)) if i not in failed_indices]
+    # Keep the slices between the sorted failed indices: a single linear pass, copied at C level
+    kept = []
+    start = 0
+    for idx in sorted(failed_indices):
+        if idx >= start:
+            kept.extend(hash_list[start:idx])
+            start = idx + 1
+    kept.extend(hash_list[start:])
+    hash_list = kept
 
     # Write the new hash list
-    with open(hash_list_path, 'w') as f:
-        f.writelines(hash_list)
+    Path(hash_list_path).write_text("".join(hash_list))
+
+    if verbose:
+        print("hash_list.txt updated.")
 
-    print("hash_list.txt updated.")
+    return len(hash_list)
 
 def update_npg_progress(last_plan, progress_path):
     """
@@ -400,20 +577,7 @@ def update_npg_progress(last_plan, progress_path):
         last_plan (int): The number of the last generated plan.
         progress_path (str): The path to the progress file to be updated.
     """
-    # Read the content of the file
-    with open(progress_path, 'r') as f:
-        lines = f.readlines()
-
-    # Search the row that contains 'hash_list_progress = '
-    for l, line in enumerate(lines):
-        if line.startswith("npg_progress = "):
-            # Overwrite the value with the new value
-            lines[l] = f"npg_progress = {last_plan}\n"
-            break
-    
-    # Rewrite the file with the new value
-    with open(progress_path, 'w') as file:
-        file.writelines(lines)
+    _set_progress_key(progress_path, "npg_progress", last_plan)
 
 def find_parent_before_directory(start_path, target_directory):
     """
@@ -437,6 +601,16 @@ def find_parent_before_directory(start_path, target_directory):
 
     return None  # Not found
 
+# Parent path of the project directory, found once when the module is loaded
+_PROJECT_ROOT = find_parent_before_directory(__file__, "Project")
+
+# Directory of the planners and path of Validate, joined once from the project root
+if _PROJECT_ROOT:
+    _PLANNERS_DIR = os.path.join(_PROJECT_ROOT, "Project/planner/planners_and_val")
+    _VALIDATE_PATH = os.path.join(_PLANNERS_DIR, "VAL/build/linux64/Release/bin/Validate")
+else:
+    _PLANNERS_DIR = _VALIDATE_PATH = None
+
 def find_planner_and_validate_paths(planner):
     """
     Finds the paths for the planner and validation tool based on the project structure.
@@ -446,23 +620,15 @@ def find_planner_and_validate_paths(planner):
         
     Returns:
         planner_path (str), validate_path (str): The paths for the planner and validation tool.
+        
+    Raises:
+        FileNotFoundError: If this file is not inside the 'Project' directory.
     """
-    # Starting path (e.g., the path of the executed script)
-    start_path = __file__
-
-    # Name of the target directory
-    target_directory = "Project"
+    if _PLANNERS_DIR is None:
+        raise FileNotFoundError("The 'Project' directory was not found above the planner module.")
 
-    # Find the parent path before the target directory
-    parent_path = find_parent_before_directory(start_path, target_directory)
-
-    if parent_path:
-        origin_planners = "Project/planner/planners_and_val"
-        origin_validate = "Project/planner/planners_and_val/VAL/build/linux64/Release/bin/Validate"
-        planner_path = os.path.join(parent_path, origin_planners, planner)
-        validate_path = os.path.join(parent_path, origin_validate)       
-    
-    return planner_path, validate_path
+    planner_path = os.path.join(_PLANNERS_DIR, planner)
+    return planner_path, _VALIDATE_PATH
 
 def read_failed_problems_file(failed_problems_after_Ctrl_C):
     """
@@ -478,8 +644,7 @@ def read_failed_problems_file(failed_problems_after_Ctrl_C):
 
     # Read existing problems from the file
     if os.path.exists(failed_problems_after_Ctrl_C):
-        with open(failed_problems_after_Ctrl_C, 'r') as f:
-            existing_problems = set(line.strip() for line in f)
+        existing_problems = set(line.strip() for line in Path(failed_problems_after_Ctrl_C).read_text().splitlines())
     return existing_problems
 
 def update_failed_problems_file(existing_problems, failed_problems_after_Ctrl_C):
@@ -490,13 +655,18 @@ def update_failed_problems_file(existing_problems, failed_problems_after_Ctrl_C)
         existing_problems (set): A set of problem names that have previously failed.
         failed_problems_after_Ctrl_C (str): The path to the file where failed problems are recorded.
     """
+    # Read the problems already recorded in the file
+    try:
+        already_recorded = set(map(str.strip, Path(failed_problems_after_Ctrl_C).read_text().splitlines()))
+    except FileNotFoundError:
+        already_recorded = set()
+
     # Filter out problems not yet in the file
-    new_problems = [problem for problem in existing_problems if problem not in existing_problems]
+    new_problems = set(existing_problems) - already_recorded
 
-    # Add only new problems
+    # Add only new problems, with a single write
     with open(failed_problems_after_Ctrl_C, 'a') as f:
-        for problem in new_problems:
-            f.write(f"{problem}\n")
+        f.writelines(f"{problem}\n" for problem in sorted(new_problems))
 
 def update_fp_progress(progress_path, fp_progress):
     """
@@ -506,20 +676,7 @@ def update_fp_progress(progress_path, fp_progress):
         progress_path (str): The path to the progress file to be updated.
         fp_progress (int): The number of failed problems to record in the progress file.
     """
-    # Read the content of the file
-    with open(progress_path, 'r') as file:
-        lines = file.readlines()
-
-    # Search the row that contains 'npg_progress ='
-    for l, line in enumerate(lines):
-        if line.startswith("failed_problems_progress = "):
-            # Sovrascrivi il valore con il nuovo valore
-            lines[l] = f"failed_problems_progress = {fp_progress}\n"
-            break
-    
-    # Rewrite the file with the new value
-    with open(progress_path, 'w') as file:
-        file.writelines(lines)
+    _set_progress_key(progress_path, "failed_problems_progress", fp_progress)
 
 def read_fp_progress(progress_path):
     """
@@ -531,19 +688,13 @@ def read_fp_progress(progress_path):
     Returns:
         Value (int): The number of failed problems recorded in the progress file, or 0 if not found.
     """
-    # Define a regex pattern to match the line containing 'failed_problems_progress'
-    pattern = r"failed_problems_progress\s*=\s*(\d+)"
-    
     # Check if the progress file exists
     if os.path.exists(progress_path):
-        with open(progress_path, 'r') as f:
-            content = f.read()
-            
-            # Search for the pattern in the file content
-            match = re.search(pattern, content)
-            if match:
-                # If a match is found, return the captured number (group 1)
-                return int(match.group(1))
+        # Search for the pattern in the file content
+        match = _FP_PROGRESS_RE.search(Path(progress_path).read_text())
+        if match:
+            # If a match is found, return the captured number (group 1)
+            return int(match.group(1))
     # Return 0 if no progress file exists or no match is found
     return 0
 
@@ -555,17 +706,18 @@ def update_h_progress(progress_path, count_rows):
         progress_path (str): The path to the progress file to be updated.
         count_rows (int): The number of rows to record in the progress file.
     """
-    # Read the content of the file
-    with open(progress_path, 'r') as f:
-        lines = f.readlines()
+    _set_progress_key(progress_path, "hash_list_progress", count_rows)
 
-    # Search the row that contains 'hash_list_progress = '
-    for l, line in enumerate(lines):
-        if line.startswith("hash_list_progress = "):
-            # Overwrite the value with the new value
-            lines[l] = f"hash_list_progress = {count_rows}\n"
-            break
+def _set_progress_key(progress_path, key, value):
+    """
+    Overwrites the value of a key in the progress file, with a single read and a single write.
     
-    # Rewrite the file with the new value
-    with open(progress_path, 'w') as file:
-        file.writelines(lines)
\ No newline at end of file
+    Args:
+        progress_path (str): The path to the progress file to be updated.
+        key (str): The key to update (e.g. 'npg_progress').
+        value: The new value of the key.
+    """
+    path = Path(progress_path)
+    # Replace only the first row that starts with the key
+    content = re.sub(rf"^{re.escape(key)}\s*=.*$", f"{key} = {value}", path.read_text(), count=1, flags=re.M)
+    path.write_text(content)
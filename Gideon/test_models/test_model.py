@@ -30,6 +30,9 @@ __maintainer__ = "Nicholas Attolino"
 __email__ = "nicholasattolino@gmail.com"
 __status__ = "Development"
 
+# Regex pattern compiled once at import time
+_PROBLEM_NUM_RE = re.compile(r'problem_(\d+)')     # Number of a problem file
+
 def load_model(model_name):
     """
     Load a machine learning model from a specified URL.
@@ -92,14 +95,14 @@ def request_plan_to_the_model(domain_problem, execution_times):
     stream_response = requests.post(url, headers=headers, json=data, verify=False, stream=True)
     client = sseclient.SSEClient(stream_response)
 
-    start_request = time.time()
+    start_request = time.perf_counter()
     assistant_message = ''
     for event in client.events():
         payload = json.loads(event.data)
         chunk = payload['choices'][0]['delta']['content']
         assistant_message += chunk
         print(chunk, end='')
-    full_time = time.time() - start_request
+    full_time = time.perf_counter() - start_request
 
     print()
     print(f"Time required for the request: {full_time:.2f}")
@@ -208,7 +211,7 @@ def main(args):
     # Sort the list based on the numeric part of the file name
     failed_problems = sorted(
         failed_problems,
-        key=lambda x: int(re.search(r'problem_(\d+)', os.path.basename(x)).group(1))
+        key=lambda x: int(_PROBLEM_NUM_RE.search(os.path.basename(x)).group(1))
     )
     # Print failed problems for invalid plans
     print("\nThe following problems did not result in viable plans:")
@@ -2,9 +2,17 @@
 import json
 import re
 import os
-import datetime
+import sys
+import time
 import numpy as np
 from pathlib import Path
+from functools import lru_cache     # To find the name of the same domain only once
+
+# Faster JSON parser, optional: the standard json module is used if missing
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Project metadata
 __author__ = "Nicholas Attolino"
@@ -15,6 +23,9 @@ __maintainer__ = "Nicholas Attolino"
 __email__ = "nicholasattolino@gmail.com"
 __status__ = "Development"
 
+# Name following a keyword of the PDDL headers (the keyword itself is found with str.find)
+_HEADER_NAME_RE = re.compile(r'\s+(\w+)')
+
 class Folders_Structure:
     def __init__(self, dataset_dir_path, model_name):
         """
@@ -34,18 +45,14 @@ class Folders_Structure:
         Returns:
             tuple: Paths to the test set JSON file and the domains directory.
         """
-        # Create models_result folder
+        # Paths of the models_result, model and domains folders
         models_result_dir_name = "models_result"
         m_r_dir_path = Path(self.dataset_dir_path) / models_result_dir_name
-        os.makedirs(m_r_dir_path, exist_ok=True)
-
-        # Create model folder
-        model_dir_path = Path(m_r_dir_path) / self.model_name
-        os.makedirs(model_dir_path, exist_ok=True)
-
-        # Create domains, problems and plans folders
+        model_dir_path = m_r_dir_path / self.model_name
         domains_dir = "domains"
-        domains_dir_path = Path(model_dir_path) / domains_dir
+        domains_dir_path = model_dir_path / domains_dir
+
+        # Create all the folders at once (makedirs also creates the missing parents)
         os.makedirs(domains_dir_path, exist_ok=True)
 
         # Create the JSON file path
@@ -57,6 +64,9 @@ def open_json_file(test_set_json):
     """
     Open and load data from a JSON file.
 
+    The file is read as raw bytes in a single call and parsed with orjson if
+    installed, with the standard json module otherwise.
+
     Args:
         test_set_json (Path): The path to the JSON file to be opened.
 
@@ -68,90 +78,124 @@ def open_json_file(test_set_json):
     """
     # Check if the file exists
     if test_set_json.exists() and test_set_json.suffix == '.json':
-        with open(test_set_json, 'r') as file:
-            # Load data from JSON file
-            json_data = json.load(file)
-            return json_data
+        with open(test_set_json, 'rb') as file:
+            content = file.read()
+        # Load data from JSON file
+        json_data = orjson.loads(content) if orjson is not None else json.loads(content)
+        return json_data
     else:
         raise FileNotFoundError(f"The {test_set_json} file  doesn't exist or is not a valid JSON file.")
     
-def find_domain_name(domain):
+def _find_header_name(text, keyword, after_define, start=0):
     """
-    Extract the domain name from a given domain string.
+    Extract the word that comes immediately after a keyword of a PDDL header.
+
+    The keyword is located with str.find, much faster than a regex over the whole
+    text, and the regex only matches the name at the found position.
 
     Args:
-        domain (str): The domain string from which to extract the name.
+        text (str): The PDDL string to search.
+        keyword (str): The keyword preceding the name, e.g. '(domain'.
+        after_define (bool): If True, the keyword must follow '(define' (spaces allowed in between).
+        start (int): The position where the search starts.
 
     Returns:
-        str or None: The extracted domain name or None if not found.
+        str or None: The word after the first valid keyword or None if not found.
     """
-    # Use a regex to find "domain" and the word that comes immediately after
-    match = re.search(r'\(define\s*\(domain\s+(\w+)', domain)
-    if match:
-        return match.group(1)  # Return the found word
-    else:
-        return None  # No words found after "domain"
-    
-def find_domain_name_in_problem(problem):
+    start = text.find(keyword, start)
+    while start >= 0:
+        if after_define:
+            # Skip back over the spaces before the keyword
+            j = start
+            while j > 0 and text[j - 1].isspace():
+                j -= 1
+            valid = j >= 7 and text.startswith("(define", j - 7)
+        else:
+            valid = True
+        if valid and (match := _HEADER_NAME_RE.match(text, start + len(keyword))):
+            return match.group(1)
+        start = text.find(keyword, start + 1)
+    return None
+
+def parse_pddl_header(text):
     """
-    Extract the domain name from a given problem string.
+    Extract the names declared in the header of a PDDL domain or problem string, in a single pass.
+
+    The header comes first in PDDL: '(define (domain NAME)' for a domain and
+    '(define (problem NAME) (:domain NAME)' for a problem. Each keyword is searched
+    from where the previous one ended, so the rest of the text is not scanned.
 
     Args:
-        problem (str): The problem string from which to extract the domain name.
+        text (str): The PDDL string to parse.
 
     Returns:
-        str or None: The extracted domain name or None if not found.
+        dict: The 'domain' name, the 'problem' name and the 'ref_domain' referenced by a problem, None if not found.
     """
-    # Use a regex to find "domain" and the word that comes immediately after
-    match = re.search(r'\(:domain\s+(\w+)', problem)
-    if match:
-        return match.group(1)  # Return the found word
-    else:
-        return None  # No words found after "domain"
-
-def find_problem_name(problem):
+    header = {"domain": None, "problem": None, "ref_domain": None}
+
+    start = text.find("(define")
+    while start >= 0:
+        # Skip the spaces after '(define'
+        j = start + 7
+        while j < len(text) and text[j].isspace():
+            j += 1
+
+        if text.startswith("(domain", j) and (match := _HEADER_NAME_RE.match(text, j + 7)):
+            header["domain"] = match.group(1)
+            return header
+        if text.startswith("(problem", j) and (match := _HEADER_NAME_RE.match(text, j + 8)):
+            header["problem"] = match.group(1)
+            # The ':domain' of a problem follows its name (searched from the start only if it does not)
+            header["ref_domain"] = (_find_header_name(text, "(:domain", after_define=False, start=match.end())
+                                    or _find_header_name(text, "(:domain", after_define=False))
+            return header
+        start = text.find("(define", start + 1)
+
+    # Not a complete header: a problem may still reference its domain
+    header["ref_domain"] = _find_header_name(text, "(:domain", after_define=False)
+    return header
+
+@lru_cache(maxsize=32)
+def find_domain_name(domain):
     """
-    Extract the problem name from a given problem string.
+    Extract the domain name from a given domain string.
+
+    The test set repeats the same few domains for all their problems, so the
+    names are cached by domain text instead of scanning it for every problem.
 
     Args:
-        problem (str): The problem string from which to extract the name.
+        domain (str): The domain string from which to extract the name.
 
     Returns:
-        str or None: The extracted problem name or None if not found.
+        str or None: The extracted domain name or None if not found.
     """
-    # Use a regex to find "problem" and the word that comes immediately after
-    match = re.search(r'\(define\s*\(problem\s+(\w+)', problem)
-    if match:
-        return match.group(1)  # Return the found word
-    else:
-        return None  # No words found after "problem"
+    # Find "(define (domain" and the word that comes immediately after (None if not found)
+    return _find_header_name(domain, "(domain", after_define=True)
     
 def write_domain_and_create_logs_dir(domains_dir_path, domain):
     """
     Write the domain to a PDDL file and create necessary directories.
 
     Args:
-        domains_dir_path (Path): The path to the domains directory.
+        domains_dir_path (str): The path to the domains directory.
         domain (str): The domain content to be written.
 
     Returns:
         tuple: Paths to the domain directory, domain name, domain file path, and logs directory.
     """
     domain_name = find_domain_name(domain)
-    domain_dir_path = Path(domains_dir_path) / domain_name
-    os.makedirs(domain_dir_path, exist_ok=True)
-    domain_file_name = f"{domain_name}.pddl"
-    domain_file_path = Path(domain_dir_path) / domain_file_name
-    if domain_file_path.exists() and domain_file_path.is_file():
-        pass
-    else:
-        with open(domain_file_path, "w") as f:
-            f.writelines(domain)
+    domain_dir_path = os.path.join(domains_dir_path, domain_name)
 
-    # Create the logs folder path
+    # Create the domain and logs folders at once (makedirs also creates the missing parents)
     logs_dir = "logs"
-    logs_dir_path = Path(domain_dir_path) / logs_dir
+    logs_dir_path = os.path.join(domain_dir_path, logs_dir)
     os.makedirs(logs_dir_path, exist_ok=True)
+
+    domain_file_name = f"{domain_name}.pddl"
+    domain_file_path = os.path.join(domain_dir_path, domain_file_name)
+    if not os.path.isfile(domain_file_path):
+        with open(domain_file_path, "w") as f:
+            f.write(domain)     # A single write of the whole string (writelines would iterate its characters)
     return domain_dir_path, domain_name, domain_file_path, logs_dir_path
 
 def write_problem(problem, domain_name, domain_dir_path):
@@ -161,20 +205,21 @@ def write_problem(problem, domain_name, domain_dir_path):
     Args:
         problem (str): The problem content to be written.
         domain_name (str): The name of the domain to validate against.
-        domain_dir_path (Path): The path to the domain directory.
+        domain_dir_path (str): The path to the domain directory.
 
     Returns:
         tuple: The problem name and the path to the problem file.
     """
-    domain_name_in_problem = find_domain_name_in_problem(problem)
+    header = parse_pddl_header(problem)     # Problem and domain names with a single pass
+    domain_name_in_problem = header["ref_domain"]
     if domain_name_in_problem == domain_name:
-        problems_dir_path = Path(domain_dir_path) / "problems"
+        problems_dir_path = os.path.join(domain_dir_path, "problems")
         os.makedirs(problems_dir_path, exist_ok=True)
-        problem_name = find_problem_name(problem)
+        problem_name = header["problem"]
         problem_file_name = f"{problem_name}.pddl"
-        problem_file_path = Path(problems_dir_path) / problem_file_name
+        problem_file_path = os.path.join(problems_dir_path, problem_file_name)
         with open(problem_file_path, "w") as file:
-            file.writelines(problem)
+            file.write(problem)
     return problem_name, problem_file_path
 
 def write_plan(domain_dir_path, problem_name, assistant_message):
@@ -182,19 +227,19 @@ def write_plan(domain_dir_path, problem_name, assistant_message):
     Write the assistant's message as a plan to a PDDL file.
 
     Args:
-        domain_dir_path (Path): The path to the domain directory.
+        domain_dir_path (str): The path to the domain directory.
         problem_name (str): The name of the problem for which the plan is generated.
         assistant_message (str): The content of the plan to be written.
 
     Returns:
         tuple: The path to the plan file and the plans directory path.
     """
-    plans_dir_path = Path(domain_dir_path) / "plans"
+    plans_dir_path = os.path.join(domain_dir_path, "plans")
     os.makedirs(plans_dir_path, exist_ok=True)
     plan_name = f"{problem_name}.plan"
-    plan_file_path = Path(plans_dir_path) / plan_name
+    plan_file_path = os.path.join(plans_dir_path, plan_name)
     with open(plan_file_path, "w") as pfile:
-        pfile.writelines(assistant_message)
+        pfile.write(assistant_message)
     return plan_file_path, plans_dir_path
 
 def write_log(logs_dir_path, plans_failed, plans_dir_path, avg_time, min_time, max_time, median_time, std_dev):
@@ -202,7 +247,7 @@ def write_log(logs_dir_path, plans_failed, plans_dir_path, avg_time, min_time, m
     Write planning statistics to a log file.
 
     Args:
-        logs_dir_path (Path): The path to the logs directory.
+        logs_dir_path (str): The path to the logs directory.
         plans_failed (int): The number of plans that failed.
         plans_dir_path (str): The directory where generated plans are stored.
         avg_time (float): The average time taken for planning.
@@ -212,20 +257,22 @@ def write_log(logs_dir_path, plans_failed, plans_dir_path, avg_time, min_time, m
         std_dev (float): The standard deviation of planning times.
     """
     # Generate timestamp for log filename
-    current_date = datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+    current_date = time.strftime('%Y-%m-%d_%H-%M-%S')
     log_filename = f"times_planning_{current_date}.log"
-    log_file_path = Path(logs_dir_path) / log_filename
+    log_file_path = os.path.join(logs_dir_path, log_filename)
     
-    # Write generation statistics to log file
+    # Write generation statistics to log file, with a single write
     with open(log_file_path, 'w') as log_file:
-        log_file.write(f"Total of plans failed: {plans_failed}\n")
-        log_file.write(f"Directory of generated plans: {plans_dir_path}\n")
-        log_file.write("\n ----- Times for planning -----\n")
-        log_file.write(f"Average Time: {avg_time:.2f} seconds\n")
-        log_file.write(f"Min Time: {min_time:.2f} seconds\n")
-        log_file.write(f"Max Time: {max_time:.2f} seconds\n")
-        log_file.write(f"Median Time: {median_time:.2f} seconds\n")
-        log_file.write(f"Standard Deviation: {std_dev:.2f} seconds")
+        log_file.write(
+            f"Total of plans failed: {plans_failed}\n"
+            f"Directory of generated plans: {plans_dir_path}\n"
+            "\n ----- Times for planning -----\n"
+            f"Average Time: {avg_time:.2f} seconds\n"
+            f"Min Time: {min_time:.2f} seconds\n"
+            f"Max Time: {max_time:.2f} seconds\n"
+            f"Median Time: {median_time:.2f} seconds\n"
+            f"Standard Deviation: {std_dev:.2f} seconds"
+        )
 
 def calculate_statistics(execution_times):
     """
@@ -238,11 +285,15 @@ def calculate_statistics(execution_times):
         tuple: Contains average, minimum, maximum, median, and standard deviation of execution times.
     """
     if execution_times:
-        avg_time = np.mean(execution_times)
-        min_time = np.min(execution_times)
-        max_time = np.max(execution_times)
-        median_time = np.median(execution_times)
-        std_dev = np.std(execution_times)
+        times = np.asarray(execution_times, dtype=np.float64)   # Convert the list only once
+        avg_time = times.mean()
+        min_time = times.min()
+        max_time = times.max()
+        median_time = np.median(times)      # Selection by partition, no full sort
+
+        # Standard deviation from the mean already computed (np.std would compute it again)
+        deviations = times - avg_time
+        std_dev = np.sqrt(np.dot(deviations, deviations) / times.size)
 
         return avg_time, min_time, max_time, median_time, std_dev
     else:
@@ -262,11 +313,14 @@ def final_output(plans_failed, plans_dir_path, avg_time, min_time, max_time, med
         median_time (float): Median time taken for planning.
         std_dev (float): Standard deviation of planning times.
     """
-    print(f"Total of plans failed: {plans_failed}")
-    print(f"Directory of generated plans: {plans_dir_path}")
-    print("\n ----- Times for planning -----\n")
-    print(f"Average Time: {avg_time:.2f} seconds")
-    print(f"Min Time: {min_time:.2f} seconds")
-    print(f"Max Time: {max_time:.2f} seconds")
-    print(f"Median Time: {median_time:.2f} seconds")
-    print(f"Standard Deviation: {std_dev:.2f} seconds")
\ No newline at end of file
+    # Whole summary with a single write to stdout
+    sys.stdout.write(
+        f"Total of plans failed: {plans_failed}\n"
+        f"Directory of generated plans: {plans_dir_path}\n"
+        "\n ----- Times for planning -----\n\n"
+        f"Average Time: {avg_time:.2f} seconds\n"
+        f"Min Time: {min_time:.2f} seconds\n"
+        f"Max Time: {max_time:.2f} seconds\n"
+        f"Median Time: {median_time:.2f} seconds\n"
+        f"Standard Deviation: {std_dev:.2f} seconds\n"
+    )
\ No newline at end of file